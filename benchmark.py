@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Luminosity benchmarks
+---------------------
+Headless, reproducible timings for the pieces that matter on the Pis:
+
+* the decode -> convert -> scale -> present pipeline of light_basic.py, on
+  synthetic clips at several resolutions and codecs, under Qt's offscreen
+  platform
+* MIDI packet encode/decode (midi_protocol.py, as used by transmission.py
+  and receiver.py)
+* SisterShip.get_status and a metrics sample from sisterwing.py
+
+Results are printed (or written with --output) as JSON so runs can be diffed
+before deploying, e.g. `python3 benchmark.py --output bench.json`.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import timeit
+import contextlib
+
+# Must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QRect, QTimer
+from PyQt5.QtWidgets import QApplication
+
+import light_basic
+import midi_protocol
+import sisterwing
+import decoders
+import keyframes
+
+RESOLUTIONS = [(640, 360), (1280, 720), (1920, 1080)]
+# fourcc -> container; codecs the local OpenCV build can't write are skipped
+CODECS = {"mp4v": ".mp4", "avc1": ".mp4", "MJPG": ".avi"}
+CLIP_FPS = 30
+CLIP_FRAMES = 90
+SCREEN_SIZE = (1920, 1080)
+
+
+def make_clip(directory, width, height, fourcc, frames=CLIP_FRAMES, fps=CLIP_FPS):
+    """Write a synthetic moving-gradient clip, returns its path or None if the codec is unavailable"""
+    path = os.path.join(directory, f"synthetic_{width}x{height}_{fourcc}{CODECS[fourcc]}")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        return None
+    # Deterministic content with motion and detail, so encoders do real work
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    for i in range(frames):
+        row = ((x + i * 8) % 256).astype(np.uint8)
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = row[None, :, None]
+        frame += noise
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def bench_pipeline(app, clip, frames, screen_size=SCREEN_SIZE, realtime=0.0, decoder="ffmpeg"):
+    """Per-stage timings for one clip, plus achieved fps when played in real time"""
+    thread = light_basic.VideoThread(clip, decoder=decoder)
+    if not thread.cap.isOpened():
+        return {"error": "could not open clip"}
+    player = light_basic.VideoPlayer(0, QRect(0, 0, *screen_size), clip, video_thread=thread)
+    # Keep every frame visible, blinking would skip the present stage
+    player.blink.enabled = False
+    # Shown (offscreen), so the present stage includes the actual paint
+    player.show()
+
+    # Drive the stages synchronously, as fast as they go
+    started = time.perf_counter()
+    for seq in range(1, frames + 1):
+        t0 = time.perf_counter()
+        ret, frame = thread.read_frame()
+        if not ret:
+            break
+        thread.profiler.add("decode", time.perf_counter() - t0)
+        thread.scale_frame(frame, thread.ring[seq % len(thread.ring)])
+        thread.frame_seq = seq
+        player.process_frame(seq)
+    elapsed = time.perf_counter() - started
+    result = {
+        "frames": frames,
+        "decoder": thread.decoder,
+        "throughput_fps": round(frames / elapsed, 1),
+        "stages": thread.profiler.summary(),
+    }
+
+    if realtime > 0:
+        # Paced playback through the real thread and event loop
+        player.stats()
+        thread.start()
+        QTimer.singleShot(int(realtime * 1000), app.quit)
+        app.exec_()
+        stats = player.stats()
+        result["realtime"] = {key: stats[key] for key in
+                              ("fps", "target_fps", "dropped_frames", "late_frames")}
+        thread.stop()
+    player.close()
+    thread.cap.release()
+    return result
+
+
+def bench_status(number=2000):
+    ship = sisterwing.SisterShip()
+    results = {
+        "get_status_us": round(timeit.timeit(ship.get_status, number=number) / number * 1e6, 2),
+        "metrics_sample_us": round(timeit.timeit(ship.metrics.sample, number=50) / 50 * 1e6, 2),
+    }
+    ship.metrics.stop()
+    ship.executor.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Luminosity benchmarks, JSON output")
+    parser.add_argument("--frames", type=int, default=60, help="Frames per pipeline run")
+    parser.add_argument("--realtime", type=float, default=2.0,
+                        help="Seconds of paced playback per clip (0 to skip)")
+    parser.add_argument("--resolutions", nargs="*", default=[f"{w}x{h}" for w, h in RESOLUTIONS],
+                        help="Clip resolutions, e.g. 1280x720")
+    parser.add_argument("--codecs", nargs="*", default=list(CODECS), choices=list(CODECS))
+    parser.add_argument("--decoder", choices=["auto"] + decoders.BACKENDS, default="ffmpeg",
+                        help="Decode backend; pinned by default so runs compare like with like")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {
+        "host": socket.gethostname(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opencv": cv2.__version__,
+        "pipeline": {},
+    }
+
+    # The player's own status prints would corrupt JSON on stdout
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(sys.stderr):
+        # Synthetic clips mustn't touch the host's decoder profile or keyframe cache
+        decoders.PROFILE_PATH = os.path.join(directory, "decoders.json")
+        keyframes.CACHE_DIR = os.path.join(directory, "keyframes")
+        for resolution in args.resolutions:
+            width, height = (int(v) for v in resolution.split("x"))
+            for fourcc in args.codecs:
+                key = f"{width}x{height}/{fourcc}"
+                clip = make_clip(directory, width, height, fourcc)
+                if clip is None:
+                    results["pipeline"][key] = {"skipped": "codec not available"}
+                    continue
+                print(f"Benchmarking {key}...", file=sys.stderr)
+                results["pipeline"][key] = bench_pipeline(app, clip, args.frames,
+                                                          realtime=args.realtime,
+                                                          decoder=args.decoder)
+
+    results["midi"] = midi_protocol.benchmark(number=20000)
+    results["status"] = bench_status()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
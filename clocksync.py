@@ -0,0 +1,189 @@
+"""
+Clock sync
+----------
+Lets the players on several Pis agree on one clock, so every wall shows the
+same frame and blinks on the same frame. One host leads and answers time
+requests over UDP; the others poll it NTP-style:
+
+    t1 follower sends -> t2 leader receives, t3 leader replies -> t4 follower receives
+    offset = ((t2 - t1) + (t3 - t4)) / 2    delay = (t4 - t1) - (t3 - t2)
+
+and keep the offset of the recent sample with the lowest round-trip delay,
+the one least skewed by network queuing. The shared clock is the leader's
+time.monotonic(), so wall-clock steps on either side don't matter.
+
+To try it on one machine:
+    python3 clocksync.py --lead
+    python3 clocksync.py 127.0.0.1        (in as many other shells as you like)
+"""
+
+import socket
+import struct
+import argparse
+import threading
+import time
+from collections import deque
+
+SYNC_PORT = 8083
+SYNC_INTERVAL = 1.0  # Seconds between polls once synced
+SYNC_BURST_INTERVAL = 0.05  # Seconds between the first few polls
+SYNC_SAMPLES = 8  # Recent samples the lowest-delay one is picked from
+SYNC_TIMEOUT = 0.5  # Seconds to wait for a reply
+
+MAGIC = b"LSYN"
+REQUEST = struct.Struct("!4sId")  # magic, seq, t1
+REPLY = struct.Struct("!4sIddd")  # magic, seq, t1, t2, t3
+
+
+class ClockLeader:
+    """Answers time requests with this host's monotonic clock"""
+
+    def __init__(self, port=SYNC_PORT):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('', port))
+        self.sock.settimeout(SYNC_TIMEOUT)
+        self.port = port
+        self.requests = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, name="ClockLeader", daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(REQUEST.size)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            t2 = time.monotonic()
+            if len(data) != REQUEST.size:
+                continue
+            magic, seq, t1 = REQUEST.unpack(data)
+            if magic != MAGIC:
+                continue
+            self.requests += 1
+            try:
+                self.sock.sendto(REPLY.pack(MAGIC, seq, t1, t2, time.monotonic()), addr)
+            except OSError:
+                pass
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+
+class SharedClock:
+    """The leader's clock as seen from this host: time.monotonic() plus an offset
+
+    With no leader given this host is the leader and the offset stays 0.
+    Otherwise a background thread keeps polling the leader.
+    """
+
+    def __init__(self, leader=None, interval=SYNC_INTERVAL):
+        self.offset = 0.0
+        self.delay = None
+        self.samples = deque(maxlen=SYNC_SAMPLES)
+        self.synced = threading.Event()
+        self.running = False
+        if leader is None:
+            self.leader = None
+            self.synced.set()
+            return
+        host, _, port = leader.partition(":")
+        self.leader = (host, int(port or SYNC_PORT))
+        self.interval = interval
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(SYNC_TIMEOUT)
+        self.running = True
+        self.thread = threading.Thread(target=self._poll, name="SharedClock", daemon=True)
+        self.thread.start()
+
+    def now(self):
+        """Current time on the shared clock"""
+        return time.monotonic() + self.offset
+
+    def wait(self, timeout=None):
+        """Block until the first sample is in, returns False on timeout"""
+        return self.synced.wait(timeout)
+
+    def _poll(self):
+        seq = 0
+        while self.running:
+            seq += 1
+            sample = self._request(seq)
+            if sample is not None:
+                self.samples.append(sample)
+                # The lowest-delay sample carries the least queuing error
+                self.offset, self.delay = min(self.samples, key=lambda s: s[1])
+                self.synced.set()
+            burst = len(self.samples) < SYNC_SAMPLES
+            time.sleep(SYNC_BURST_INTERVAL if burst else self.interval)
+
+    def _request(self, seq):
+        """One round trip, returns (offset, delay) or None if it got no valid reply"""
+        t1 = time.monotonic()
+        try:
+            self.sock.sendto(REQUEST.pack(MAGIC, seq, t1), self.leader)
+            while True:
+                data = self.sock.recv(REPLY.size)
+                t4 = time.monotonic()
+                if len(data) != REPLY.size:
+                    continue
+                magic, reply_seq, _, t2, t3 = REPLY.unpack(data)
+                # Replies to earlier, timed-out requests are stale
+                if magic == MAGIC and reply_seq == seq:
+                    break
+        except OSError:
+            return None
+        return ((t2 - t1) + (t3 - t4)) / 2, (t4 - t1) - (t3 - t2)
+
+    def stats(self):
+        return {
+            "leader": f"{self.leader[0]}:{self.leader[1]}" if self.leader else None,
+            "synced": self.synced.is_set(),
+            "offset_ms": round(self.offset * 1000, 3),
+            "delay_ms": round(self.delay * 1000, 3) if self.delay is not None else None,
+        }
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lead or follow the shared playback clock")
+    parser.add_argument("leader", nargs="?", metavar="HOST[:PORT]", help="Leader to follow")
+    parser.add_argument("--lead", action="store_true", help="Be the leader")
+    parser.add_argument("--port", type=int, default=SYNC_PORT, help="Port to lead on")
+    args = parser.parse_args()
+    if args.lead == bool(args.leader):
+        parser.error("give either --lead or a leader to follow")
+
+    if args.lead:
+        leader = ClockLeader(args.port)
+        print(f"Leading the clock on UDP port {args.port}")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"{leader.requests} requests answered")
+        except KeyboardInterrupt:
+            leader.stop()
+        return
+
+    clock = SharedClock(args.leader)
+    try:
+        while True:
+            time.sleep(1)
+            print(clock.stats())
+    except KeyboardInterrupt:
+        clock.stop()
+
+
+if __name__ == "__main__":
+    main()
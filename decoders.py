@@ -0,0 +1,193 @@
+"""
+Decoder backends
+----------------
+Picks how a clip gets decoded. Each candidate (GStreamer with the v4l2
+stateless/stateful, omx or libav decoders, and OpenCV's FFmpeg with hardware
+acceleration or with threads) is opened on the actual clip and timed for a
+few seconds of frames. The one that keeps up with the clip for the least CPU
+wins, and the result is saved to a per-host profile so later starts skip the
+probe.
+
+Run this file with a clip to see the probe table, e.g.
+`python3 decoders.py trance1.mp4`.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import cv2
+
+PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".config", "luminosity",
+                            f"decoders-{socket.gethostname()}.json")
+
+# Seconds of the clip decoded per candidate, after a few warm-up frames
+PROBE_SECONDS = 3.0
+PROBE_WARMUP_FRAMES = 5
+
+# Per GStreamer decoder element, in order of preference
+GST_DECODERS = {
+    "v4l2sl": "v4l2slh264dec",
+    "v4l2": "v4l2h264dec",
+    "omx": "omxh264dec",
+    "avdec": f"avdec_h264 max-threads={os.cpu_count() or 1}",
+}
+FFMPEG_BACKENDS = ("ffmpeg-hw", "ffmpeg")
+BACKENDS = list(GST_DECODERS) + list(FFMPEG_BACKENDS)
+
+# Backends that take the decode off the CPU
+HARDWARE = {"v4l2sl", "v4l2", "omx", "ffmpeg-hw"}
+
+
+def open_backend(video_path, name):
+    """Open the clip with one backend, returns the capture or None if it isn't available"""
+    if name in GST_DECODERS:
+        gst_pipeline = (
+            f'filesrc location={video_path} ! '
+            f'qtdemux ! h264parse ! {GST_DECODERS[name]} ! '
+            'videoconvert ! appsink'
+        )
+        cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
+    elif name == "ffmpeg-hw":
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG,
+                               [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+        # OpenCV quietly decodes in software when no accelerator is found
+        if cap.isOpened() and not cap.get(cv2.CAP_PROP_HW_ACCELERATION):
+            cap.release()
+            return None
+    elif name == "ffmpeg":
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG,
+                               [cv2.CAP_PROP_N_THREADS, os.cpu_count() or 1])
+    else:
+        raise ValueError(f"Unknown decoder backend: {name}")
+    if not cap.isOpened():
+        cap.release()
+        return None
+    return cap
+
+
+def clip_format(video_path):
+    """Codec and resolution of the clip, e.g. "h264 1920x1080"; profiles are keyed on it"""
+    cap = cv2.VideoCapture(video_path)
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    codec = fourcc.to_bytes(4, "little").decode("ascii", "replace").strip("\0 ").lower()
+    key = f"{codec or 'unknown'} {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}"
+    cap.release()
+    return key
+
+
+def measure(cap, seconds=PROBE_SECONDS):
+    """Decode up to `seconds` of clip, returns {"fps", "cpu_ms", "frames"} or None"""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frames = int(seconds * (fps if 0 < fps < 1000 else 30))
+    for _ in range(PROBE_WARMUP_FRAMES):
+        if not cap.grab():
+            return None
+    buffer = None
+    count = 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    while count < frames:
+        ret, buffer = cap.read(buffer)
+        if not ret:
+            break
+        count += 1
+    # process_time covers every thread, so decoder threads are counted too
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    if count == 0:
+        return None
+    return {"fps": round(count / wall, 1), "cpu_ms": round(1000 * cpu / count, 2), "frames": count}
+
+
+def probe(video_path, backends=BACKENDS):
+    """Time every available backend on the clip, returns (winner or None, {name: result})"""
+    cap = cv2.VideoCapture(video_path)
+    source_fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    results = {}
+    for name in backends:
+        cap = open_backend(video_path, name)
+        if cap is None:
+            results[name] = None
+            continue
+        results[name] = measure(cap)
+        cap.release()
+
+    usable = {name: r for name, r in results.items() if r}
+    if not usable:
+        return None, results
+    # Least CPU among those that keep up with the clip, else simply the fastest
+    realtime = {name: r for name, r in usable.items() if r["fps"] >= source_fps}
+    if realtime:
+        winner = min(realtime, key=lambda name: realtime[name]["cpu_ms"])
+    else:
+        winner = max(usable, key=lambda name: usable[name]["fps"])
+    return winner, results
+
+
+def load_profile(path=None):
+    path = path or PROFILE_PATH
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profile(profile, path=None):
+    path = path or PROFILE_PATH
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(profile, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save decoder profile: {e}")
+
+
+def select_backend(video_path, reprobe=False):
+    """Backend for this host and clip format, probing once and caching the result"""
+    key = clip_format(video_path)
+    profile = load_profile()
+    entry = profile.get(key)
+    if entry and not reprobe:
+        return entry["backend"]
+
+    print(f"Probing decoders for {key}...")
+    winner, results = probe(video_path)
+    for name, result in results.items():
+        print(f"  {name:>9}: {result if result else 'not available'}")
+    if winner is None:
+        return None
+    profile[key] = {"backend": winner, "probed_at": time.time(), "results": results}
+    save_profile(profile)
+    return winner
+
+
+def open_capture(video_path, backend="auto", reprobe=False):
+    """Open the clip with the given or best backend, returns (capture, backend name)
+
+    Falls back through the other backends if the chosen one won't open.
+    """
+    if backend == "auto":
+        backend = select_backend(video_path, reprobe) or "ffmpeg"
+    for name in [backend] + [b for b in BACKENDS if b != backend]:
+        cap = open_backend(video_path, name)
+        if cap is not None:
+            return cap, name
+    # Nothing opened, still hand back a capture so callers can check isOpened()
+    return cv2.VideoCapture(video_path), None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(f"Usage: {sys.argv[0]} VIDEO")
+    winner, results = probe(sys.argv[1])
+    for name, result in results.items():
+        if result is None:
+            print(f"{name:>9}: not available")
+        else:
+            print(f"{name:>9}: {result['fps']:7.1f} fps, {result['cpu_ms']:6.2f} ms CPU/frame"
+                  f"{' (hardware)' if name in HARDWARE else ''}")
+    print(f"best: {winner}")
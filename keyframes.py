@@ -0,0 +1,70 @@
+"""
+Keyframe index
+--------------
+Seeking H.264 to an arbitrary frame means decoding forward from the previous
+keyframe, which is what makes random starts and loop wraps stall. This module
+finds the keyframes of a clip once, by demuxing packets with OpenCV's raw
+stream mode (no decoding), and caches the result on disk so later starts
+cost nothing.
+"""
+
+import os
+import json
+import bisect
+import hashlib
+import cv2
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "luminosity", "keyframes")
+
+
+def _cache_path(video_path):
+    # Keyed on path, size and mtime, so a replaced clip gets re-indexed
+    st = os.stat(video_path)
+    key = f"{os.path.abspath(video_path)}:{st.st_size}:{st.st_mtime_ns}"
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+def build_index(video_path):
+    """Scan the clip's packets, returns (keyframe frame numbers, total frames)"""
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        cap.release()
+        return [], 0
+    keyframes = []
+    total = 0
+    while cap.grab():
+        if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            keyframes.append(total)
+        total += 1
+    cap.release()
+    return keyframes, total
+
+
+def load_index(video_path):
+    """Keyframe frame numbers and total frames, from the cache or built and cached"""
+    try:
+        cache_path = _cache_path(video_path)
+    except OSError:
+        return [], 0
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        return cached["keyframes"], cached["total"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    keyframes, total = build_index(video_path)
+    if keyframes:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump({"keyframes": keyframes, "total": total}, f)
+        except OSError as e:
+            print(f"Could not cache keyframe index: {e}")
+    return keyframes, total
+
+
+def keyframe_at_or_before(keyframes, frame):
+    """Nearest keyframe at or before `frame` (0 if there is none)"""
+    i = bisect.bisect_right(keyframes, frame)
+    return keyframes[i - 1] if i else 0
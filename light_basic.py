@@ -1,162 +1,723 @@
 import sys
 import os
+import argparse
+import json
+import tempfile
 import cv2
 import numpy as np
 import random
+import threading
 import time
-from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QShortcut
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
-from PyQt5.QtGui import QImage, QPixmap, QKeySequence
+from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QShortcut, QWidget
+from collections import deque
+from PyQt5.QtCore import Qt, QRect, QTimer, QThread, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QKeySequence
 
 
 # Import the MidiReceiver
 from receiver import MidiReceiver
+from keyframes import load_index, keyframe_at_or_before
+from decoders import open_capture, select_backend, BACKENDS, HARDWARE
+from clocksync import ClockLeader, SharedClock, SYNC_PORT
 
 
 os.environ['DISPLAY'] = ':0'
 
+# Pacing rate when neither the video nor the screen reports one
+DEFAULT_FPS = 30.0
+
+# Ring slots beyond the requested history: one being read, one being written
+RING_SPARE_SLOTS = 2
+
+# Largest --frame-offsets lag: every frame of lag is another full-screen RGB
+# buffer per screen size in the ring (about 6 MB each at 1080p)
+MAX_FRAME_OFFSET = 30
+
+# How long before the end of the clip its start is prefetched for the loop
+LOOP_PREFETCH_SECONDS = 1.0
+
+# While no screen shows video, keep the stream moving with grab() only for
+# this long (blink off phases), then stop decoding until one does
+SUSPEND_AFTER_SECONDS = 1.0
+
+# Blink presets, one drawn at random every RANDOMIZE_PERIOD seconds:
+# (min, max) ms per on/off phase, None for no blinking
+BLINK_PATTERNS = {
+    "fast": (50, 150),
+    "medium": (200, 400),
+    "slow": (500, 1000),
+    "off": None,
+}
+RANDOMIZE_PERIOD = 150.0  # 2.5 minutes
+
+# With --sync every host draws blink presets from this seed, so walls blink together
+SYNC_BLINK_SEED = 0
+SYNC_WAIT = 3.0  # Seconds to wait for the first clock sample before starting anyway
+
+# Default memory budget for --preload, never more than half of what's available.
+# Shared by every decoder in the process: np.empty doesn't commit pages, so
+# MemAvailable alone can't tell decoders preloading side by side apart
+PRELOAD_BUDGET_MB = 1024
+preload_lock = threading.Lock()
+preload_claimed = 0  # Bytes reserved by decoders' frame stores
+
+# Where player stats are published for sisterwing.py to pick up
+PLAYER_STATS_PATH = os.path.join(tempfile.gettempdir(), "luminosity_player.json")
+PLAYER_STATS_INTERVAL = 2000  # ms
+
+# Frames of per-stage timings kept for the rolling profile
+PROFILE_WINDOW = 120
+OVERLAY_INTERVAL = 500  # ms between on-screen profile refreshes
+
+# Interpolation used when pre-scaling frames to the screen size
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+    "cubic": cv2.INTER_CUBIC,
+}
+
+
+def fit_size(src_w, src_h, dst_w, dst_h):
+    """Largest size with the source aspect ratio that fits inside dst"""
+    scale = min(dst_w / src_w, dst_h / src_h)
+    return max(1, round(src_w * scale)), max(1, round(src_h * scale))
+
+
+def available_memory():
+    """MemAvailable in bytes from /proc/meminfo, None if it can't be read"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class StageProfiler:
+    """Rolling per-stage timings (decode, convert, scale, present)
+
+    Stages are fed from both the decode thread and the GUI thread; deque
+    appends are atomic, so no lock is needed.
+    """
+
+    STAGES = ("decode", "convert", "scale", "present")
+
+    def __init__(self, window=PROFILE_WINDOW):
+        self.samples = {stage: deque(maxlen=window) for stage in self.STAGES}
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def summary(self):
+        """{stage: {"avg_ms", "max_ms"}} over the window"""
+        summary = {}
+        for stage, samples in self.samples.items():
+            samples = list(samples)
+            if samples:
+                summary[stage] = {"avg_ms": round(1000 * sum(samples) / len(samples), 2),
+                                  "max_ms": round(1000 * max(samples), 2)}
+            else:
+                summary[stage] = {"avg_ms": None, "max_ms": None}
+        return summary
+
+
+class BlinkSchedule:
+    """Blink visibility as a function of frame time
+
+    Each RANDOMIZE_PERIOD gets a preset drawn from a generator seeded with the
+    period's index, so visibility at any time is a pure function that the
+    decode thread and the GUI work out alike, frame by frame. A CC 70
+    override replaces the preset until the next period starts.
+    """
+
+    def __init__(self, origin=None, seed=None, period=RANDOMIZE_PERIOD):
+        self.origin = time.monotonic() if origin is None else origin
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.period = period
+        self.enabled = True  # CC 70 at 0 turns blinking off
+        self.override = None  # (phase ms, since, period index) from CC 70
+        self.cached = (None, None)  # (period index, preset phase ms)
+
+    def index(self, t):
+        return int((t - self.origin) // self.period)
+
+    def preset(self, index):
+        """Phase length (ms) of the random preset for period `index`, None for no blinking"""
+        cached_index, interval = self.cached
+        if cached_index == index:
+            return interval
+        rng = random.Random(f"{self.seed}:{index}")
+        limits = BLINK_PATTERNS[rng.choice(list(BLINK_PATTERNS))]
+        interval = rng.randint(*limits) if limits else None
+        self.cached = (index, interval)
+        return interval
+
+    def set_interval(self, interval, now):
+        """Blink with `interval` ms phases from `now` until the next period"""
+        self.enabled = True
+        # Snapped to the interval grid, so synced hosts that get the same CC
+        # within one phase start blinking on the same frame
+        since = (now * 1000 // interval) * interval / 1000
+        self.override = (interval, since, self.index(now))
+
+    def visible(self, t):
+        if not self.enabled:
+            return True
+        index = self.index(t)
+        override = self.override
+        if override is not None and override[2] == index:
+            interval, since = override[0], override[1]
+        else:
+            interval, since = self.preset(index), self.origin + index * self.period
+        if interval is None:
+            return True
+        # Starts with an on phase, like the old toggle timer
+        return int((t - since) * 1000 // interval) % 2 == 0
+
 
 # VideoThread with random start position
 class VideoThread(QThread):
-    frame_ready = pyqtSignal(np.ndarray)
+    # Emits the sequence number of the latest frame, read it with frame_at()
+    frame_ready = pyqtSignal(int)
 
-    def __init__(self, video_path):
+    def __init__(self, video_path, history=1, interpolation=cv2.INTER_AREA, refresh_rate=0,
+                 preload_budget=0, decoder="auto", clock=None):
         super().__init__()
-        # Use GStreamer pipeline for hardware acceleration
-        gst_pipeline = (
-            f'filesrc location={video_path} ! '
-            'qtdemux ! h264parse ! omxh264dec ! '
-            'videoconvert ! appsink'
-        )
-        self.cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
-
-        # Fallback to regular capture if GStreamer fails
-        if not self.cap.isOpened():
-            self.cap = cv2.VideoCapture(video_path)
-
-        # Randomize starting position
-        if self.cap.isOpened():
-            total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            if total_frames > 0:
-                random_frame = random.randint(0, total_frames - 1)
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, random_frame)
+        self.video_path = video_path
+        # Shared clock (clocksync.py) the frame index is taken from, None to free-run
+        self.clock = clock
+        # Decode backend probed once per host and clip format, see decoders.py
+        self.cap, self.decoder = open_capture(video_path, decoder)
+        kind = "hardware" if self.decoder in HARDWARE else "software"
+        print(f"Decoding {video_path} with {self.decoder} ({kind})")
+
+        # Keyframe index (cached on disk), so seeks land where no decoding forward is needed
+        self.keyframes, self.total_frames = load_index(video_path)
+        if not self.total_frames and self.cap.isOpened():
+            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.position = 0  # Frame number of the next read
+
+        # Second capture opened and decoded up to its first frame before the
+        # clip ends, so looping is a swap instead of a seek back to 0
+        self.loop_cap = None
+        self.loop_frame = None
+        self.prefetcher = None
+
+        # Randomize starting position; synced, the clock decides where to start
+        if self.cap.isOpened() and self.total_frames > 0 and clock is None:
+            self.seek(random.randint(0, self.total_frames - 1))
+
+        # Pace decoding to the source fps, never faster than the screen refreshes
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.source_fps = fps
+        if not 0 < fps < 1000:
+            fps = refresh_rate or DEFAULT_FPS
+        if refresh_rate > 0:
+            fps = min(fps, refresh_rate)
+        self.fps = fps
+        # Rate frame numbers advance at on the shared clock
+        self.clip_fps = self.source_fps if 0 < self.source_fps < 1000 else fps
+        self.loop_prefetch_frames = int(fps * LOOP_PREFETCH_SECONDS)
+
+        # Frame counters: late = skipped because decode fell behind schedule,
+        # dropped = decoded but overwritten before the GUI picked it up
+        self.frame_seq = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+        self.notify_pending = False
+        self.frame_ready.connect(self.frame_delivered)
 
         self.running = True
-        self.frame_buffer = None
+
+        # Target sizes to pre-scale for; players with the same geometry share one
+        self.targets = {}
+        self.interpolation = interpolation
+
+        # Fixed ring of preallocated output buffers, written in place. Two spare
+        # slots keep the one being read by the GUI clear of the one being written,
+        # the rest let players sharing this decoder lag behind it.
+        self.ring = [{} for _ in range(max(1, history) + RING_SPARE_SLOTS)]
+        self.decode_buffer = None
+        self.scratch = {}
+
+        # With a budget (bytes), short clips are decoded once into RAM at the
+        # target sizes and played from there: {target: frames x h x w x 3 array}
+        self.preload_budget = preload_budget
+        self.store = None
+        self.preload_claim = 0  # Bytes of the shared budget this decoder holds
+
+        # {viewer: showing video}; with viewers and none of them showing, nothing is decoded
+        self.viewers = {}
+        # {viewer: BlinkSchedule}; frames due while every screen blinks off aren't retrieved
+        self.schedules = {}
+        # Scheduled time of the latest frame, what blink schedules are evaluated at
+        self.frame_time = clock.now() if clock is not None else time.monotonic()
+        self.wake = threading.Event()
+        self.wake.set()
+        self.suspended = False
+
+        self.profiler = StageProfiler()
 
     def run(self):
+        if self.preload_budget and self.targets:
+            self.preload()
+        interval = 1.0 / self.fps
+        next_time = time.monotonic()
         while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
-                # Video ended, restart
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret, frame = self.cap.read()
+            if not self.wake.is_set():
+                next_time = self.idle(next_time)
+                continue
+
+            if self.clock is not None:
+                # Synced: the shared clock says which frame is due and when
+                next_time = self.sync()
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                # Behind schedule: skip late frames with grab() instead of decoding them
+                lag = time.monotonic() - next_time
+                if lag > 1.0:
+                    # Stalled for a long time, resync rather than skipping ahead
+                    next_time += lag
+                    lag = 0
+                while lag > interval and self.running:
+                    self.skip_frame()
+                    self.late_frames += 1
+                    next_time += interval
+                    lag -= interval
+
+            # On the shared clock's timeline when synced, so blinks line up too
+            frame_time = next_time + (self.clock.offset if self.clock is not None else 0.0)
+            seq = self.frame_seq + 1
+            if not self.showing(frame_time):
+                # Every screen is in a blink off phase: step over the frame
+                # without retrieving or converting it, re-announce the last one
+                self.skip_frame()
+                seq = self.frame_seq
+            elif self.store is not None:
+                # Preloaded: the slot just points into the store, nothing to decode
+                self.ring[seq % len(self.ring)] = {key: frames[self.position]
+                                                   for key, frames in self.store.items()}
+                self.skip_frame()
+            else:
+                started = time.perf_counter()
+                ret, frame = self.read_frame()
                 if not ret:
+                    self.msleep(int(interval * 1000))
                     continue
-
-            # Convert OpenCV BGR to RGB (do this in the thread)
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            self.frame_buffer = frame_rgb
-            self.frame_ready.emit(frame_rgb)
-
-            # Small sleep to reduce CPU usage
-            self.msleep(5)
+                self.profiler.add("decode", time.perf_counter() - started)
+
+                # Scale and convert BGR to RGB here, so the GUI thread only blits
+                self.scale_frame(frame, self.ring[seq % len(self.ring)])
+            self.frame_time = frame_time
+            self.publish(seq)
+
+            # Sleep until the next frame is due
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def set_visible(self, viewer, visible):
+        """Tell the decoder whether `viewer` is showing video (called from the GUI thread)"""
+        self.viewers[viewer] = visible
+        self.update_wake()
+
+    def add_viewer(self, viewer, schedule=None):
+        self.viewers[viewer] = True
+        if schedule is not None:
+            self.schedules[viewer] = schedule
+        self.update_wake()
+
+    def remove_viewer(self, viewer):
+        self.viewers.pop(viewer, None)
+        self.schedules.pop(viewer, None)
+        self.update_wake()
+
+    def showing(self, t):
+        """Whether any viewer shows the frame due at `t`"""
+        if not self.viewers:
+            return True
+        return any(visible and (viewer not in self.schedules or self.schedules[viewer].visible(t))
+                   for viewer, visible in list(self.viewers.items()))
+
+    def update_wake(self):
+        if not self.viewers or any(self.viewers.values()):
+            self.wake.set()
+        else:
+            self.wake.clear()
+
+    def idle(self, next_time):
+        """Nothing on screen: advance with grab() only, then suspend; returns the new schedule"""
+        interval = 1.0 / self.fps
+        hidden_since = time.monotonic()
+        while self.running and not self.wake.is_set():
+            if time.monotonic() - hidden_since < SUSPEND_AFTER_SECONDS:
+                # Short blank, likely a blink: keep pace without retrieving or converting
+                self.skip_frame()
+                next_time += interval
+                self.wake.wait(max(0.0, next_time - time.monotonic()))
+                continue
+            # Long blank: stop decoding, then pick up where the clip would be by now
+            self.suspended = True
+            suspended_at = time.monotonic()
+            self.wake.wait()
+            self.suspended = False
+            if self.clock is None:
+                # Synced, the next sync() does this
+                self.jump(round((time.monotonic() - suspended_at) * self.fps))
+            next_time = time.monotonic()
+        return next_time
+
+    def sync(self):
+        """Line the stream up with the shared clock, returns the local time the frame is due"""
+        offset = self.clock.offset
+        frame_number = int((time.monotonic() + offset) * self.clip_fps)
+        if self.total_frames:
+            behind = (frame_number - self.position) % self.total_frames
+            ahead = self.total_frames - behind
+            if behind and ahead < self.clip_fps:
+                # Slightly ahead, the clock was corrected backwards: hold until it catches up
+                frame_number += ahead
+            elif behind:
+                if behind < self.clip_fps:
+                    self.late_frames += behind
+                self.jump(behind)
+        return frame_number / self.clip_fps - offset
+
+    def jump(self, frames):
+        """Move `frames` ahead (wrapping), seeking only when that beats grabbing through them"""
+        if not self.total_frames or frames <= 0:
+            return
+        target = (self.position + frames) % self.total_frames
+        if self.store is not None:
+            self.position = target
+            return
+        start = keyframe_at_or_before(self.keyframes, target) if self.keyframes else target
+        if not start <= self.position <= target:
+            self.seek(target)
+        for _ in range(target - self.position):
+            self.skip_frame()
+
+    def seek(self, frame):
+        """Jump to the nearest keyframe at or before `frame`, returns the frame landed on"""
+        target = keyframe_at_or_before(self.keyframes, frame) if self.keyframes else frame
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        self.position = target
+        if self.prefetcher is not None and self.loop_frame is None and not self.prefetcher.is_alive():
+            # A prefetch that failed gets another try next time round
+            self.prefetcher = None
+        return target
+
+    def read_frame(self):
+        """Read the next frame into the decode buffer, looping at the end of the video"""
+        ret, frame = self.cap.read(self.decode_buffer)
+        if ret:
+            self.advance()
+        elif self.loop_frame is not None:
+            # Video ended, continue on the prefetched capture from its first frame
+            frame = self.loop_frame
+            self.swap_loop_capture()
+            ret = True
+        else:
+            # Video ended before the prefetch was ready, restart the slow way
+            self.seek(0)
+            ret, frame = self.cap.read(self.decode_buffer)
+            if ret:
+                self.advance()
+        if ret:
+            self.decode_buffer = frame
+        return ret, frame
+
+    def skip_frame(self):
+        """Step past a frame without decoding it"""
+        if self.store is not None:
+            self.position = (self.position + 1) % self.total_frames
+        elif self.cap.grab():
+            self.advance()
+        elif self.loop_frame is not None:
+            self.swap_loop_capture()
+        else:
+            self.seek(0)
+
+    def advance(self):
+        self.position += 1
+        # Near the end: get the start of the clip ready in the background
+        if (self.total_frames and self.prefetcher is None and self.loop_cap is None
+                and self.position >= self.total_frames - self.loop_prefetch_frames):
+            self.prefetcher = threading.Thread(target=self.prefetch_loop, name="LoopPrefetch",
+                                               daemon=True)
+            self.prefetcher.start()
+
+    def prefetch_loop(self):
+        cap, _ = open_capture(self.video_path, self.decoder or "ffmpeg")
+        ret, frame = cap.read() if cap.isOpened() else (False, None)
+        if not ret:
+            cap.release()
+            return
+        # loop_frame is what the decode thread checks, publish it last
+        self.loop_cap = cap
+        self.loop_frame = frame
+
+    def swap_loop_capture(self):
+        """Continue on the prefetched capture, whose first frame has already been read"""
+        self.prefetcher.join()
+        self.prefetcher = None
+        self.cap.release()
+        self.cap = self.loop_cap
+        self.loop_cap = self.loop_frame = None
+        self.position = 1
+
+    def publish(self, seq):
+        """Make frame `seq` the latest one; latest wins, signals never pile up"""
+        self.frame_seq = seq
+        if self.notify_pending:
+            # The GUI hasn't caught up with the previous frame, it will never see it
+            self.dropped_frames += 1
+            return
+        self.notify_pending = True
+        self.frame_ready.emit(seq)
+
+    def frame_delivered(self, seq):
+        # Connected first, so it runs on the GUI thread before the players read
+        self.notify_pending = False
+
+    def preload(self):
+        """Decode the whole clip into RAM at the target sizes, returns False if it streams instead"""
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if not (self.total_frames and width and height):
+            print("Preload skipped: frame count or size unknown, streaming")
+            return False
+
+        sizes = {key: fit_size(width, height, *key) for key in self.targets}
+        needed = self.total_frames * sum(w * h * 3 for w, h in sizes.values())
+        global preload_claimed
+        with preload_lock:
+            budget = self.preload_budget
+            available = available_memory()
+            if available is not None:
+                budget = min(budget, available // 2)
+            # What other decoders reserved may not show in MemAvailable yet
+            budget -= preload_claimed
+            if needed > budget:
+                print(f"Preload skipped: clip needs {needed / 2**20:.0f} MiB at screen size, "
+                      f"{max(0, budget) / 2**20:.0f} MiB of the budget left, streaming")
+                return False
+            preload_claimed += needed
+            self.preload_claim = needed
+
+        store = {key: np.empty((self.total_frames, h, w, 3), dtype=np.uint8)
+                 for key, (w, h) in sizes.items()}
+        self.seek(0)
+        count = 0
+        while count < self.total_frames and self.running:
+            started = time.perf_counter()
+            ret, frame = self.cap.read(self.decode_buffer)
+            if not ret:
+                break
+            self.profiler.add("decode", time.perf_counter() - started)
+            self.decode_buffer = frame
+            # scale_frame writes straight into the store's rows
+            self.scale_frame(frame, {key: frames[count] for key, frames in store.items()})
+            count += 1
+        if count == 0:
+            self.release_preload()
+            self.seek(0)
+            return False
+
+        self.store = {key: frames[:count] for key, frames in store.items()}
+        self.total_frames = count
+        self.position = random.randrange(count)
+        # Nothing is read from disk from here on
+        self.cap.release()
+        size = sum(frames.nbytes for frames in self.store.values())
+        print(f"Preloaded {count} frames ({size / 2**20:.0f} MiB)")
+        return True
+
+    def release_preload(self):
+        """Give this decoder's share of the preload budget back"""
+        global preload_claimed
+        with preload_lock:
+            preload_claimed -= self.preload_claim
+            self.preload_claim = 0
+        self.store = None
+
+    def add_target(self, width, height):
+        """Register a display size to pre-scale frames for, returns its key"""
+        key = (width, height)
+        self.targets[key] = None
+        return key
+
+    def scale_frame(self, frame, slot):
+        """Fill slot with {target: RGB frame}, resizing once per distinct target size"""
+        src_h, src_w = frame.shape[:2]
+        convert_time = scale_time = 0.0
+        for key in list(self.targets):
+            size = fit_size(src_w, src_h, *key)
+            dst = slot.get(key)
+            if dst is None or dst.shape[1::-1] != size:
+                dst = slot[key] = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            started = time.perf_counter()
+            if size == (src_w, src_h):
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+                convert_time += time.perf_counter() - started
+            elif size[0] * size[1] < src_w * src_h:
+                # Downscaling: convert the smaller image
+                small = self.scratch.get(key)
+                small = cv2.resize(frame, size, dst=small, interpolation=self.interpolation)
+                self.scratch[key] = small
+                scaled = time.perf_counter()
+                cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=dst)
+                scale_time += scaled - started
+                convert_time += time.perf_counter() - scaled
+            else:
+                frame_rgb = self.scratch.get(key)
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+                self.scratch[key] = frame_rgb
+                converted = time.perf_counter()
+                cv2.resize(frame_rgb, size, dst=dst, interpolation=self.interpolation)
+                convert_time += converted - started
+                scale_time += time.perf_counter() - converted
+        self.profiler.add("convert", convert_time)
+        self.profiler.add("scale", scale_time)
+
+    def frame_at(self, offset):
+        """Return the frames decoded `offset` frames ago (clamped to the ring)"""
+        seq = self.frame_seq
+        if seq == 0:
+            return None
+        offset = max(0, min(offset, seq - 1, len(self.ring) - RING_SPARE_SLOTS))
+        return self.ring[(seq - offset) % len(self.ring)]
 
     def stop(self):
         self.running = False
+        self.wake.set()
         self.wait()
+        if self.prefetcher is not None:
+            self.prefetcher.join()
+        if self.loop_cap is not None:
+            self.loop_cap.release()
         self.cap.release()
+        self.release_preload()
+
+
+class VideoSurface(QWidget):
+    """Paints RGB frames straight from their numpy buffers, letterboxed; black when blank"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # paintEvent covers every pixel, skip Qt's background erase
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.frame = None  # Keeps the buffer the image wraps alive
+        self.image = None
+
+    def set_frame(self, frame):
+        """Show an RGB frame (wrapped, not copied), or black for None"""
+        if frame is None and self.frame is None:
+            return
+        self.frame = frame
+        if frame is None:
+            self.image = None
+        else:
+            h, w, _ = frame.shape
+            self.image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888)
+        # Paint now rather than on the next pass: the decoder reuses ring
+        # buffers a couple of frames later, so the image must not outlive this call
+        self.repaint()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.rect()
+        if self.image is None:
+            painter.fillRect(rect, Qt.black)
+            return
+        w, h = fit_size(self.image.width(), self.image.height(), rect.width(), rect.height())
+        target = QRect((rect.width() - w) // 2, (rect.height() - h) // 2, w, h)
+        if target != rect:
+            # Letterbox bars
+            painter.fillRect(rect, Qt.black)
+        if target.size() != self.image.size():
+            # Frames are pre-scaled to the screen, this only happens after a resize
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(target, self.image)
 
 
 # VideoPlayer with MIDI handling and randomized blink patterns
 class VideoPlayer(QMainWindow):
-    def __init__(self, screen_num, screen_geom, video_path):
+    def __init__(self, screen_num, screen_geom, video_path, video_thread=None, frame_offset=0,
+                 interpolation=cv2.INTER_AREA, midi_group=None, overlay=False, preload_budget=0,
+                 decoder="auto", clock=None):
         super().__init__()
+        self.screen_num = screen_num
         self.setWindowTitle(f"Video Player {screen_num+1}")
         self.setGeometry(screen_geom)
         self.video_enabled = True
-        # Create label to display video frames
-        self.video_label = QLabel(self)
-        self.video_label.setGeometry(0, 0, screen_geom.width(), screen_geom.height())
-        self.video_label.setAlignment(Qt.AlignCenter)
+        # Create surface to paint video frames on
+        self.video_surface = VideoSurface(self)
+        self.video_surface.setGeometry(0, 0, screen_geom.width(), screen_geom.height())
 
         # Set background color to black
         self.setStyleSheet("background-color: black;")
 
-        # Create video thread
-        self.video_thread = VideoThread(video_path)
+        # Create video thread, or subscribe to a decoder shared between screens
+        self.frame_offset = frame_offset
+        self.owns_video_thread = video_thread is None
+        if self.owns_video_thread:
+            screens = QApplication.screens()
+            refresh_rate = screens[screen_num].refreshRate() if screen_num < len(screens) else 0
+            video_thread = VideoThread(video_path, interpolation=interpolation,
+                                       refresh_rate=refresh_rate, preload_budget=preload_budget,
+                                       decoder=decoder, clock=clock)
+        self.video_thread = video_thread
+        self.frame_key = self.video_thread.add_target(screen_geom.width(), screen_geom.height())
         self.video_thread.frame_ready.connect(self.process_frame)
-        self.video_thread.start()
-
-        # Get video FPS
-        self.fps = self.video_thread.cap.get(cv2.CAP_PROP_FPS)
-
-        # Precompute black frame
-        height = screen_geom.height()
-        width = screen_geom.width()
-        self.black_frame = np.zeros((height, width, 3), dtype=np.uint8)
-        q_img = QImage(self.black_frame.data, width, height, width * 3, QImage.Format_RGB888)
-        self.black_pixmap = QPixmap.fromImage(q_img)
-
-        # Current pixmap to display
-        self.current_pixmap = self.black_pixmap
-
-        # Blinking control - use timer-based approach
+        if self.owns_video_thread:
+            self.video_thread.start()
+
+        # Presentation rate the decoder is paced to
+        self.fps = self.video_thread.fps
+        self.frames_presented = 0
+        self.stats_since = (time.monotonic(), 0)
+        self.shown_seq = 0
+        self.overlay_since = self.stats_since
+
+        # Blinking is worked out per frame from a schedule of random presets,
+        # re-drawn every 2.5 minutes, and CC 70 overrides
         self.show_video = True
-
-        # Set up separate timer for blinking effect
-        self.blink_timer = QTimer(self)
-        self.blink_timer.timeout.connect(self.toggle_blink)
-        self.blink_timer.start(100)  # 500ms per phase (0.5 seconds)
-
-        # Set up timer for display updates - higher refresh rate
-        self.display_timer = QTimer(self)
-        self.display_timer.timeout.connect(self.update_display)
-        self.display_timer.start(16)  # ~60fps refresh
-
-        # Randomization timer - every 2 minutes 30 seconds
-        self.randomize_timer = QTimer(self)
-        self.randomize_timer.timeout.connect(self.randomize_blink_pattern)
-        self.randomize_timer.start(150000)  # 150000ms = 2.5 minutes
+        if self.video_thread.clock is not None:
+            # Same presets at the same clock times on every synced host
+            self.blink = BlinkSchedule(origin=0.0, seed=SYNC_BLINK_SEED)
+        else:
+            self.blink = BlinkSchedule(origin=self.video_thread.frame_time)
+        self.video_thread.add_viewer(self, self.blink)
 
         # Add quit shortcut
         self.quit_shortcut = QShortcut(QKeySequence(Qt.Key_Escape), self)
         self.quit_shortcut.activated.connect(self.close)
 
+        # Profiling overlay, toggled with P
+        self.overlay_label = QLabel(self)
+        self.overlay_label.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: #0f0; font-family: monospace; padding: 6px;")
+        self.overlay_label.move(10, 10)
+        self.overlay_label.hide()
+        self.overlay_timer = QTimer(self)
+        self.overlay_timer.timeout.connect(self.update_overlay)
+        self.overlay_shortcut = QShortcut(QKeySequence(Qt.Key_P), self)
+        self.overlay_shortcut.activated.connect(self.toggle_overlay)
+
         # Add MIDI receiver
-        self.midi_receiver = MidiReceiver(callback=self.handle_midi)
+        self.midi_receiver = MidiReceiver(callback=self.handle_midi, group=midi_group)
         self.midi_receiver.start()
 
-        # MIDI control state
-        self.blink_enabled = True
-
-        # Initialize random blink pattern
-        self.randomize_blink_pattern()
-
-    def randomize_blink_pattern(self):
-        """Randomize blink behavior every 2.5 minutes"""
-        if self.blink_enabled and self.video_enabled:
-            # Random pattern: sometimes blinks a lot, sometimes doesn't
-            pattern_type = random.choice(['fast', 'slow', 'off', 'medium'])
-
-            if pattern_type == 'fast':
-                # Fast blinking (50-150ms)
-                interval = random.randint(50, 150)
-            elif pattern_type == 'medium':
-                # Medium blinking (200-400ms)
-                interval = random.randint(200, 400)
-            elif pattern_type == 'slow':
-                # Slow blinking (500-1000ms)
-                interval = random.randint(500, 1000)
-            else:  # 'off'
-                # Stop blinking for this period
-                self.blink_timer.stop()
-                self.show_video = True
-                return
-
-            self.blink_timer.setInterval(interval)
-            if not self.blink_timer.isActive():
-                self.blink_timer.start()
+        # After the receiver, the overlay shows its link stats
+        if overlay:
+            self.toggle_overlay()
 
     # Add MIDI handler method
     def handle_midi(self, msg):
@@ -170,13 +731,9 @@ class VideoPlayer(QMainWindow):
                 if not self.video_enabled:
                     # Turn off video - black screen
                     self.show_video = False
-                    self.blink_timer.stop()
-                    self.current_pixmap = self.black_pixmap
-                else:
-                    # Restore video with previous blink settings
-                    self.show_video = True
-                    if self.blink_enabled and not self.blink_timer.isActive():
-                        self.blink_timer.start()
+                    self.video_surface.set_frame(None)
+                # Restoring keeps the blink schedule; while off the decoder can idle
+                self.video_thread.set_visible(self, self.video_enabled)
 
         elif msg["type"] == "control_change":
             cc_data = msg["data"]
@@ -184,56 +741,148 @@ class VideoPlayer(QMainWindow):
                 value = cc_data["value"]
 
                 if value == 0:
-                    self.blink_enabled = False
-                    self.blink_timer.stop()
-                    if self.video_enabled:
-                        self.show_video = True
+                    self.blink.enabled = False
                 else:
-                    self.blink_enabled = True
                     interval = 500 - (value * 3.5)
                     interval = max(50, int(interval))
-                    self.blink_timer.setInterval(interval)
-
-                    if self.video_enabled and not self.blink_timer.isActive():
-                        self.blink_timer.start()
-
-    def process_frame(self, frame):
-        if self.show_video:
-            # Convert to QImage and then QPixmap
-            h, w, ch = frame.shape
-            q_img = QImage(frame.data, w, h, w * ch, QImage.Format_RGB888)
-
-            # Resize to fit label while maintaining aspect ratio
-            pixmap = QPixmap.fromImage(q_img)
-            self.current_pixmap = pixmap.scaled(
-                self.video_label.width(), 
-                self.video_label.height(), 
-                Qt.KeepAspectRatio, 
-                Qt.SmoothTransformation
-            )
-
-    def toggle_blink(self):
-        # Toggle blink state
-        self.show_video = not self.show_video
-        if not self.show_video:
+                    # Takes effect from the latest frame, until the next random preset
+                    self.blink.set_interval(interval, self.video_thread.frame_time)
+
+    def process_frame(self, seq):
+        # Always show the newest frame, whatever seq this notification carried
+        started = time.perf_counter()
+        self.shown_seq = self.video_thread.frame_seq
+        frames = self.video_thread.frame_at(self.frame_offset)
+        frame = frames.get(self.frame_key) if frames else None
+        if frame is not None:
+            # Counted even during blink-off phases, so fps reflects the pipeline
+            self.frames_presented += 1
+        # Blink edges land exactly on frames: visibility is decided for this frame's time
+        self.show_video = self.video_enabled and self.blink.visible(self.video_thread.frame_time)
+        if self.show_video and frame is not None:
+            # Frame is already scaled to fit the screen, painted without copying
+            self.video_surface.set_frame(frame)
+            self.video_thread.profiler.add("present", time.perf_counter() - started)
+        else:
             # Switch to black screen during blink phase
-            self.current_pixmap = self.black_pixmap
-
-    def update_display(self):
-        # Display current pixmap (either video frame or black)
-        self.video_label.setPixmap(self.current_pixmap)
+            self.video_surface.set_frame(None)
+
+    def measure_fps(self, since):
+        """Frames received per second since `since`, returns (fps, new since)"""
+        now = time.monotonic()
+        elapsed = now - since[0]
+        fps = (self.frames_presented - since[1]) / elapsed if elapsed > 0 else 0.0
+        return round(fps, 1), (now, self.frames_presented)
+
+    def stats(self):
+        """Playback counters and stage timings; fps is measured since the previous call"""
+        fps, self.stats_since = self.measure_fps(self.stats_since)
+        return {
+            "screen": self.screen_num,
+            "fps": fps,
+            "target_fps": self.fps,
+            "source_fps": self.video_thread.source_fps,
+            "dropped_frames": self.video_thread.dropped_frames,
+            "late_frames": self.video_thread.late_frames,
+            # Frames the decoder is ahead of what this screen last picked up
+            "queue_depth": self.video_thread.frame_seq - self.shown_seq,
+            "stages": self.video_thread.profiler.summary(),
+            "video_enabled": self.video_enabled,
+            "preloaded": self.video_thread.store is not None,
+            "decoder": self.video_thread.decoder,
+            "decoder_suspended": self.video_thread.suspended,
+            "sync": self.video_thread.clock.stats() if self.video_thread.clock is not None else None,
+            # Loss, reordering, duplicates and latency of the MIDI link, to tune the Wi-Fi by
+            "midi": self.midi_receiver.stats.snapshot(),
+        }
+
+    def toggle_overlay(self):
+        if self.overlay_label.isVisible():
+            self.overlay_timer.stop()
+            self.overlay_label.hide()
+        else:
+            self.overlay_since = (time.monotonic(), self.frames_presented)
+            self.update_overlay()
+            self.overlay_label.show()
+            self.overlay_label.raise_()
+            self.overlay_timer.start(OVERLAY_INTERVAL)
+
+    def update_overlay(self):
+        fps, self.overlay_since = self.measure_fps(self.overlay_since)
+        thread = self.video_thread
+        lines = [
+            f"fps {fps:5.1f} / paced {self.fps:.1f} / source {thread.source_fps:.1f}",
+            f"decoder {thread.decoder}",
+            f"dropped {thread.dropped_frames}  late {thread.late_frames}  "
+            f"queue {thread.frame_seq - self.shown_seq}",
+        ]
+        if thread.clock is not None:
+            sync = thread.clock.stats()
+            lines.append(f"sync offset {sync['offset_ms']} ms  delay {sync['delay_ms']} ms")
+        midi = self.midi_receiver.stats.snapshot()
+        lines.append(f"midi {midi['received']} rx  lost {midi['lost']} ({midi['loss_percent']}%)  "
+                     f"reordered {midi['reordered']}  dup {midi['duplicates']}  "
+                     f"p50 {midi['latency_ms']['p50']} ms")
+        for stage, timing in thread.profiler.summary().items():
+            if timing["avg_ms"] is not None:
+                lines.append(f"{stage:>8} {timing['avg_ms']:6.2f} ms avg {timing['max_ms']:6.2f} max")
+        self.overlay_label.setText("\n".join(lines))
+        self.overlay_label.adjustSize()
 
     def closeEvent(self, event):
-        self.blink_timer.stop()
-        self.display_timer.stop()
-        self.randomize_timer.stop()
-        self.video_thread.stop()
+        self.overlay_timer.stop()
+        # A shared decoder keeps running for the other screens
+        self.video_thread.frame_ready.disconnect(self.process_frame)
+        self.video_thread.remove_viewer(self)
+        if self.owns_video_thread:
+            self.video_thread.stop()
         self.midi_receiver.stop()  # Stop MIDI receiver on close
 
 
+def write_player_stats(windows, path=PLAYER_STATS_PATH):
+    """Atomically publish every window's stats as JSON"""
+    stats = {"timestamp": time.time(), "pid": os.getpid(),
+             "screens": [window.stats() for window in windows]}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write player stats: {e}")
+
+
 # Main program
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Multi-screen video player with MIDI control")
+    parser.add_argument("video_path", nargs="?", default="trance1.mp4", help="Video file to play")
+    parser.add_argument("--shared-decoder", action="store_true",
+                        help="Decode once and show the same stream on every screen")
+    parser.add_argument("--frame-offsets", type=int, nargs="*", default=[],
+                        help=f"Per-screen lag in frames behind the shared decoder (0-{MAX_FRAME_OFFSET})")
+    parser.add_argument("--interpolation", choices=INTERPOLATIONS, default="area",
+                        help="Resampling used when scaling frames to the screen")
+    parser.add_argument("--midi-group", help="Multicast group (zone) to take MIDI from instead of broadcast")
+    parser.add_argument("--preload", type=int, nargs="?", const=PRELOAD_BUDGET_MB, default=0, metavar="MB",
+                        help="Decode short clips once into RAM and play from there, "
+                             f"if they fit in MB, shared by all screens (default {PRELOAD_BUDGET_MB})")
+    parser.add_argument("--decoder", choices=["auto"] + BACKENDS, default="auto",
+                        help="Decode backend, auto picks the best one probed for this host")
+    parser.add_argument("--reprobe", action="store_true",
+                        help="Probe the decode backends again instead of using the saved profile")
+    parser.add_argument("--sync", metavar="HOST[:PORT]",
+                        help=f"Play in lockstep with the clock leader at HOST (default port {SYNC_PORT})")
+    parser.add_argument("--sync-lead", action="store_true",
+                        help="Lead the shared clock for other hosts started with --sync")
+    parser.add_argument("--overlay", action="store_true",
+                        help="Start with the profiling overlay shown (toggle with P)")
+    args, qt_args = parser.parse_known_args()
+    for offset in args.frame_offsets:
+        # Negative would read the slot being written, large ones cost a buffer per frame
+        if not 0 <= offset <= MAX_FRAME_OFFSET:
+            parser.error(f"frame offsets must be between 0 and {MAX_FRAME_OFFSET}, got {offset}")
+
+    app = QApplication(sys.argv[:1] + qt_args)
 
 
     # Get screen information
@@ -247,21 +896,69 @@ def main():
 
 
     # Path to video file
-    video_path = "trance1.mp4"
+    video_path = args.video_path
     if not os.path.exists(video_path):
         print(f"Error: Video file '{video_path}' not found.")
         sys.exit(1)
 
 
+    # Probe once, before any screen decodes: the probe measures process CPU,
+    # so decoders already running would be counted against the candidates
+    decoder = args.decoder
+    if decoder == "auto":
+        decoder = select_backend(video_path, args.reprobe) or "ffmpeg"
+
+
+    # Shared clock for frame-aligned playback across hosts
+    clock = None
+    if args.sync_lead:
+        leader = ClockLeader()
+        app.aboutToQuit.connect(leader.stop)
+        clock = SharedClock()
+        print(f"Leading the playback clock on UDP port {SYNC_PORT}")
+    elif args.sync:
+        clock = SharedClock(args.sync)
+        app.aboutToQuit.connect(clock.stop)
+        if not clock.wait(SYNC_WAIT):
+            print(f"No reply from clock leader {args.sync} yet, starting unsynced")
+        else:
+            print(f"Synced to {args.sync}: {clock.stats()}")
+
+
+    # One decoder for all screens, each window lagging by its own offset
+    shared_thread = None
+    offsets = [0] * screen_count
+    if args.shared_decoder:
+        offsets = (args.frame_offsets + offsets)[:screen_count]
+        refresh_rate = max(screen.refreshRate() for screen in app.screens())
+        shared_thread = VideoThread(video_path, history=max(offsets) + 1,
+                                    interpolation=INTERPOLATIONS[args.interpolation],
+                                    refresh_rate=refresh_rate,
+                                    preload_budget=args.preload * 2**20,
+                                    decoder=decoder, clock=clock)
+        app.aboutToQuit.connect(shared_thread.stop)
+        print(f"Shared decoder enabled, frame offsets: {offsets}")
+
+
     # Create video players
     test_windows = []
     for i in range(screen_count):
         screen_geom = app.desktop().screenGeometry(i)
-        window = VideoPlayer(i, screen_geom, video_path)
+        window = VideoPlayer(i, screen_geom, video_path, shared_thread, offsets[i],
+                             INTERPOLATIONS[args.interpolation], args.midi_group, args.overlay,
+                             args.preload * 2**20, decoder, clock)
         window.setWindowFlags(Qt.FramelessWindowHint)
         window.show()
         test_windows.append(window)
 
+    if shared_thread is not None:
+        shared_thread.start()
+
+    # Publish playback stats for sisterwing's status and telemetry
+    stats_timer = QTimer()
+    stats_timer.timeout.connect(lambda: write_player_stats(test_windows))
+    stats_timer.start(PLAYER_STATS_INTERVAL)
+
 
     sys.exit(app.exec_())
 
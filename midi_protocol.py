@@ -0,0 +1,149 @@
+"""
+MIDI wire format
+----------------
+Shared by transmission.py and receiver.py. Events go out as a fixed-size
+binary packet; receivers also still accept the legacy JSON payload, so old
+and new controllers can be mixed on one network.
+
+Packet layout (network byte order, 22 bytes):
+    magic (B) | version (B) | type (B) | channel (B) | note/control (B) |
+    velocity/value (B) | timestamp (d) | sender (I) | seq (I)
+
+`sender` is random per transmitter run and `seq` counts its packets, so
+receivers can drop duplicates and measure loss. Version 1 packets (the same
+without sender and seq, 14 bytes) are still decoded.
+
+Events can also go to a UDP multicast group instead of broadcast; give
+each zone of an installation its own group and point its screens at it.
+
+Run this file directly for an encode/decode microbenchmark.
+"""
+
+import json
+import socket
+import struct
+import time
+import timeit
+
+MAGIC = 0xA5  # Never '{', which is how a JSON payload starts
+VERSION = 2
+
+PACKET = struct.Struct('!BBBBBBdII')
+PACKET_V1 = struct.Struct('!BBBBBBd')
+
+# Administratively scoped (site-local) group used when none is given
+DEFAULT_GROUP = "239.255.42.1"
+
+# Wire codes per message type, and the names of its two data bytes
+MESSAGE_TYPES = {
+    'note_on': (1, 'note', 'velocity'),
+    'note_off': (2, 'note', 'velocity'),
+    'control_change': (3, 'control', 'value'),
+}
+TYPE_CODES = {code: (name, a, b) for name, (code, a, b) in MESSAGE_TYPES.items()}
+
+
+def encode_binary(msg_type, data, timestamp, sender=0, seq=0):
+    """Pack a MIDI event (data as from mido's msg.dict()) into a binary packet"""
+    code, a, b = MESSAGE_TYPES[msg_type]
+    return PACKET.pack(MAGIC, VERSION, code, data['channel'], data[a], data[b], timestamp,
+                       sender, seq & 0xFFFFFFFF)
+
+
+def encode_json(msg_type, data, timestamp, sender=0, seq=0):
+    """Legacy JSON payload"""
+    return json.dumps({"timestamp": timestamp, "type": msg_type, "data": data,
+                       "sender": sender, "seq": seq & 0xFFFFFFFF}).encode()
+
+
+def decode(packet):
+    """Decode a binary or JSON packet into {"timestamp", "type", "data", "sender", "seq"}
+
+    Returns None if invalid. sender and seq are None for packets that don't carry them.
+    """
+    if packet[:1] == bytes([MAGIC]):
+        if len(packet) == PACKET.size:
+            _, version, code, channel, a_value, b_value, timestamp, sender, seq = PACKET.unpack(packet)
+            expected = VERSION
+        elif len(packet) == PACKET_V1.size:
+            _, version, code, channel, a_value, b_value, timestamp = PACKET_V1.unpack(packet)
+            sender = seq = None
+            expected = 1
+        else:
+            return None
+        if version != expected or code not in TYPE_CODES:
+            return None
+        msg_type, a, b = TYPE_CODES[code]
+        return {
+            "timestamp": timestamp,
+            "type": msg_type,
+            "data": {"type": msg_type, "channel": channel, a: a_value, b: b_value, "time": 0},
+            "sender": sender,
+            "seq": seq,
+        }
+    try:
+        msg = json.loads(packet.decode())
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(msg, dict) or msg.get("type") not in MESSAGE_TYPES:
+        return None
+    # Held to the same shape as a binary packet, receivers index into it freely
+    _, a, b = MESSAGE_TYPES[msg["type"]]
+    data = msg.get("data")
+    if not isinstance(data, dict) or not all(_is_int(data.get(field)) for field in ("channel", a, b)):
+        return None
+    if not all(msg.get(field) is None or _is_number(msg[field]) for field in ("timestamp", "sender")):
+        return None
+    if msg.get("seq") is not None and not _is_int(msg["seq"]):
+        return None
+    msg.setdefault("sender", None)
+    msg.setdefault("seq", None)
+    return msg
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def multicast_sender(ttl=1, interface=None):
+    """UDP socket for sending to multicast groups, ttl 1 keeps it on the local subnet"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    if interface:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    return sock
+
+
+def join_multicast(sock, group, interface=None):
+    """Subscribe a bound UDP socket to a multicast group"""
+    mreq = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface or '0.0.0.0'))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+
+
+def benchmark(number=100000):
+    """Time encode+decode of a knob event in both formats, returns seconds per op"""
+    data = {"type": "control_change", "time": 0, "control": 70, "value": 64, "channel": 0}
+    now = time.time()
+    results = {}
+    for name, encode in (("json", encode_json), ("binary", encode_binary)):
+        packet = encode("control_change", data, now)
+        results[name] = {
+            "size": len(packet),
+            "encode": timeit.timeit(lambda: encode("control_change", data, now), number=number) / number,
+            "decode": timeit.timeit(lambda: decode(packet), number=number) / number,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    results = benchmark()
+    for name, r in results.items():
+        print(f"{name:>6}: {r['size']:3d} bytes, encode {r['encode'] * 1e6:.2f} us, "
+              f"decode {r['decode'] * 1e6:.2f} us")
+    json_total = results["json"]["encode"] + results["json"]["decode"]
+    binary_total = results["binary"]["encode"] + results["binary"]["decode"]
+    print(f"binary round trip is {json_total / binary_total:.1f}x faster")
@@ -1,41 +1,233 @@
 import socket
-import json
+import argparse
+import selectors
+import threading
+import time
+from collections import deque
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+# Binary packets and legacy JSON are both accepted
+from midi_protocol import decode as decode_message, join_multicast
 
 PORT = 8081
 BUFFER_SIZE = 1024
+# How far back (in sequence numbers) duplicates and reordering are tracked
+DEDUP_WINDOW = 256
+# Number of recent one-way latencies kept for percentiles
+LATENCY_SAMPLES = 1000
 
-def main():
-    # Set up UDP socket
+
+class LinkStats:
+    """De-duplicates packets by (sender, seq) and keeps loss/latency counters
+
+    Latency is receive time minus the sender's timestamp, so it is only as
+    accurate as the clock sync between the two hosts.
+    """
+
+    def __init__(self, window=DEDUP_WINDOW):
+        self.window = window
+        self.senders = {}
+        self.received = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.lost = 0
+        self.unsequenced = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def accept(self, msg, now):
+        """Record a decoded message, returns False if it is a duplicate to drop"""
+        sender, seq = msg.get("sender"), msg.get("seq")
+        if seq is None:
+            # Legacy packet, nothing to de-duplicate on
+            self.unsequenced += 1
+            self._received(msg, now)
+            return True
+
+        state = self.senders.get(sender)
+        if state is None:
+            self.senders[sender] = {"first": seq, "highest": seq, "seen": {seq}}
+            self._received(msg, now)
+            return True
+
+        # Signed distance from the highest seq so far, allowing for 32-bit wrap
+        delta = ((seq - state["highest"] + 2**31) % 2**32) - 2**31
+        seen = state["seen"]
+        if delta > 0:
+            self.lost += delta - 1
+            state["highest"] = seq
+            seen.add(seq)
+            if len(seen) > 2 * self.window:
+                oldest = seq - self.window
+                state["seen"] = {s for s in seen if ((s - oldest) % 2**32) <= self.window}
+        elif delta == 0 or seq in seen or -delta >= self.window:
+            self.duplicates += 1
+            return False
+        else:
+            # Arrived after a later packet: it fills a gap we counted as lost,
+            # unless it was sent before we started listening
+            self.reordered += 1
+            if (seq - state["first"]) % 2**32 < 2**31:
+                self.lost -= 1
+            seen.add(seq)
+        self._received(msg, now)
+        return True
+
+    def _received(self, msg, now):
+        self.received += 1
+        timestamp = msg.get("timestamp")
+        if timestamp:
+            self.latencies.append(now - timestamp)
+
+    def snapshot(self):
+        """Counters and latency percentiles (ms) as a plain dict"""
+        latencies = sorted(self.latencies)
+        percentiles = {}
+        for p in (50, 90, 99):
+            if latencies:
+                index = min(len(latencies) - 1, int(len(latencies) * p / 100))
+                percentiles[f"p{p}"] = round(latencies[index] * 1000, 3)
+            else:
+                percentiles[f"p{p}"] = None
+        expected = self.received - self.unsequenced + self.lost
+        return {
+            "senders": len(self.senders),
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "lost": self.lost,
+            "loss_percent": round(100 * self.lost / expected, 2) if expected else 0.0,
+            "latency_ms": percentiles,
+        }
+
+
+def open_socket(port=PORT, group=None, interface=None):
+    """Bind the listening socket; with a group, join it and receive only that group"""
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.bind(('', PORT))  # Empty string means all interfaces
-    
+    if group:
+        # Binding to the group address filters out other zones' groups on Linux
+        sock.bind((group, port))
+        join_multicast(sock, group, interface)
+    else:
+        sock.bind(('', port))  # Empty string means all interfaces
+    return sock
+
+
+class MidiReceiver(QObject):
+    """Non-blocking UDP listener that delivers MIDI messages on the Qt thread
+
+    The socket is watched from a background thread with selectors; every
+    message is emitted through a queued signal, so `callback` always runs in
+    the thread that created the receiver (the GUI thread), never the listener.
+    """
+
+    message_received = pyqtSignal(object)
+
+    def __init__(self, callback=None, port=PORT, group=None, interface=None, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.group = group
+        self.interface = interface
+        if callback is not None:
+            self.message_received.connect(callback, Qt.QueuedConnection)
+
+        self.sock = None
+        self.thread = None
+        self.running = False
+        self.stats = LinkStats()
+
+    def start(self):
+        if self.running:
+            return
+        self.sock = open_socket(self.port, self.group, self.interface)
+        self.sock.setblocking(False)
+        # Writing to this pair wakes the selector so stop() doesn't wait on a timeout
+        self._wake_r, self._wake_w = socket.socketpair()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._listen, name="MidiReceiver", daemon=True)
+        self.thread.start()
+        source = f"group {self.group}" if self.group else "broadcast"
+        print(f"MIDI UDP Receiver listening on port {self.port} ({source})")
+
+    def _listen(self):
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.sock, selectors.EVENT_READ)
+            selector.register(self._wake_r, selectors.EVENT_READ)
+            while self.running:
+                for key, _ in selector.select():
+                    if key.fileobj is self._wake_r:
+                        return
+                    self._drain()
+
+    def _drain(self):
+        # Read every datagram that's queued, a knob sweep arrives in bursts
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(BUFFER_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # Socket closed underneath us during shutdown
+                return
+            try:
+                msg = decode_message(data)
+                if msg is not None and self.stats.accept(msg, time.time()):
+                    self.message_received.emit(msg)
+            except Exception as e:
+                # One malformed datagram must not take the listener down
+                print(f"Dropped bad MIDI packet from {addr[0]}: {e!r}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._wake_w.send(b'\0')
+        self.thread.join()
+        self.sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print MIDI events received over UDP")
+    parser.add_argument("--group", help="Multicast group to join instead of listening for broadcasts")
+    parser.add_argument("--interface", help="Local interface address to join the group on")
+    args = parser.parse_args()
+
+    # Set up UDP socket
+    sock = open_socket(PORT, args.group, args.interface)
+
     print(f"MIDI UDP Receiver running on port {PORT}")
-    print("Waiting for broadcasts...")
-    
+    print(f"Waiting for multicast on {args.group}..." if args.group else "Waiting for broadcasts...")
+
+    stats = LinkStats()
     try:
         while True:
             # Receive data
             data, addr = sock.recvfrom(BUFFER_SIZE)
-            
-            try:
-                msg = json.loads(data.decode())
-                print(msg)
-                # Process the MIDI message
-                if msg["type"] == "note_on":
-                    note_data = msg["data"]
-                    pad_number = note_data['note'] - 36 + 1
-                    print(f"Pad {pad_number} pressed with velocity {note_data['velocity']}")
-                elif msg["type"] == "control_change":
-                    cc_data = msg["data"]
-                    print(f"Knob: controller={cc_data['control']}, value={cc_data['value']}")
-                
-            except json.JSONDecodeError:
-                print("Invalid JSON received")
-                
+
+            msg = decode_message(data)
+            if msg is None:
+                print("Invalid message received")
+                continue
+            if not stats.accept(msg, time.time()):
+                continue
+
+            print(msg)
+            # Process the MIDI message
+            if msg["type"] == "note_on":
+                note_data = msg["data"]
+                pad_number = note_data['note'] - 36 + 1
+                print(f"Pad {pad_number} pressed with velocity {note_data['velocity']}")
+            elif msg["type"] == "control_change":
+                cc_data = msg["data"]
+                print(f"Knob: controller={cc_data['control']}, value={cc_data['value']}")
+
     except KeyboardInterrupt:
         sock.close()
-        print("\nExiting...")
+        print(f"\nLink stats: {stats.snapshot()}")
+        print("Exiting...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
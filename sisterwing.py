@@ -3,7 +3,19 @@
 Sister HQ Script
 ----------------
 This script runs on the Raspberry Pi devices and receives commands from the Command HQ.
-It sets up a simple HTTP server to receive JSON commands and respond to status requests.
+It sets up a threaded HTTP/1.1 server to receive JSON commands and respond to status requests.
+Connections are kept alive, and long `execute` commands run in a bounded worker pool so
+status polls are never stuck behind them.
+
+FleetClient is the other end: it fans commands out to many ships in parallel
+over pooled keep-alive connections, e.g.
+
+    fleet = FleetClient(["dpi1.local", "dpi2.local"])
+    fleet.send_batch([{"type": "execute", "data": "git -C ~/Luminosity pull"}])
+
+With --telemetry HOST, a ship also pushes status deltas over UDP to a
+collector (`sisterwing.py --collect` on HQ), so HQ can watch the whole
+installation live without polling /status.
 """
 
 import json
@@ -11,77 +23,321 @@ import time
 import argparse
 import socket
 import os
+import queue
+import codecs
+import signal
+import select
+import selectors
 import subprocess
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import http.client
+import tempfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
 import threading
+from collections import deque
 from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
 
 # Configuration
 DEFAULT_PORT = 8081
 SHIP_NAME = socket.gethostname()  # Use hostname as ship name
+EXECUTE_WORKERS = 2  # Shell commands allowed to run at once
+KEEPALIVE_TIMEOUT = 30  # Seconds an idle keep-alive connection is held open
+METRICS_INTERVAL = 2.0  # Seconds between system metric samples
+THERMAL_ZONE = '/sys/class/thermal/thermal_zone0/temp'
+HISTORY_SIZE = 500  # Commands kept for GET /history
+HISTORY_PAGE = 50  # Default page size for GET /history
+FLEET_TIMEOUT = 10.0  # Seconds FleetClient waits on each ship
+STREAM_TIMEOUT = 600  # Default seconds a streamed execute may run before it is killed
+STREAM_MAX_OUTPUT = 16 * 1024 * 1024  # Default bytes of output streamed before the process is killed
+# Written by light_basic.py; older than PLAYER_STATS_MAX_AGE means the player isn't running
+PLAYER_STATS_PATH = os.path.join(tempfile.gettempdir(), "luminosity_player.json")
+PLAYER_STATS_MAX_AGE = 10
+TELEMETRY_PORT = 8082
+TELEMETRY_INTERVAL = 1.0  # Seconds between telemetry checks
+TELEMETRY_FULL_EVERY = 30  # Send every field each N intervals, so a new collector catches up
+# A field is only sent when it moved at least this much since it was last sent
+TELEMETRY_THRESHOLDS = {
+    "temp": 1.0,
+    "cpu": 5.0,
+    "mem": 2.0,
+    "fps": 1.0,
+    "dropped": 10,
+    "late": 10,
+    "sync": 1.0,  # ms of clock offset
+}
 
 class CommandHandler(BaseHTTPRequestHandler):
     """HTTP handler for receiving commands and providing status"""
-    
-    def _set_headers(self, content_type="application/json"):
-        self.send_response(200)
-        self.send_header('Content-type', content_type)
+
+    # HTTP/1.1 keeps the connection open between requests from Command HQ
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+
+    def _send_json(self, payload, status=200):
+        # Every response needs a Content-Length for keep-alive to work
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', "application/json")
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
+        self.wfile.write(body)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', "0")
+        self.end_headers()
+
     def do_GET(self):
-        """Handle GET requests for status"""
-        if self.path == "/status":
-            self._set_headers()
+        """Handle GET requests for status and command history"""
+        url = urlsplit(self.path)
+        if url.path == "/status":
             status = self.server.sister_ship.get_status()
-            self.wfile.write(json.dumps(status).encode())
+            self._send_json(status)
+        elif url.path == "/history":
+            query = parse_qs(url.query)
+            try:
+                since = int(query.get("since", ["0"])[0])
+                limit = int(query.get("limit", [str(HISTORY_PAGE)])[0])
+            except ValueError:
+                self._send_json({"success": False, "error": "since and limit must be integers"}, 400)
+                return
+            self._send_json(self.server.sister_ship.get_history(since, limit))
         else:
-            self.send_response(404)
-            self.end_headers()
-            
+            self._send_empty(404)
+
     def do_POST(self):
         """Handle POST requests for commands"""
+        content_length = int(self.headers.get('Content-Length', 0))
+        # Always consume the body, or the next request on this connection is garbage
+        post_data = self.rfile.read(content_length)
+
+        if self.path not in ("/command", "/commands"):
+            self._send_empty(404)
+            return
+        try:
+            payload = json.loads(post_data.decode())
+        except json.JSONDecodeError:
+            self._send_json({"success": False, "error": "Invalid JSON"}, 400)
+            return
+
         if self.path == "/command":
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            try:
-                command = json.loads(post_data.decode())
-                self._set_headers()
-                result = self.server.sister_ship.handle_command(command)
-                self.wfile.write(json.dumps({"success": True, "result": result}).encode())
-            except json.JSONDecodeError:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(json.dumps({"success": False, "error": "Invalid JSON"}).encode())
+            if isinstance(payload, dict) and payload.get("type") == "execute" and payload.get("stream"):
+                self._stream_command(payload)
+                return
+            # A bad command still gets a response, so the connection stays usable
+            result, status = self._run_one(payload)
+            self._send_json(result, status)
         else:
-            self.send_response(404)
-            self.end_headers()
-    
+            # Batch: a list of commands, or {"commands": [...]}, run in order
+            commands = payload.get("commands") if isinstance(payload, dict) else payload
+            if not isinstance(commands, list):
+                self._send_json({"success": False, "error": "Expected a list of commands"}, 400)
+                return
+            results = [self._run_one(command)[0] for command in commands]
+            self._send_json({"success": True, "results": results})
+
+    def _stream_command(self, command):
+        """Run an execute command, streaming its output as chunked NDJSON
+
+        Each line is {"stream": "stdout"|"stderr", "data": ...} as output
+        arrives, then a final {"success": True, "result": {...}} summary.
+        """
+        # Checked before the 200 goes out, afterwards an error can't change the status
+        try:
+            if not isinstance(command.get("data"), str):
+                raise ValueError("data must be the shell command to run")
+            if float(command.get("timeout", STREAM_TIMEOUT)) <= 0:
+                raise ValueError("timeout must be positive")
+            if int(command.get("max_output", STREAM_MAX_OUTPUT)) <= 0:
+                raise ValueError("max_output must be positive")
+        except (TypeError, ValueError) as e:
+            self._send_json({"success": False, "error": str(e)}, 400)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', "application/x-ndjson")
+        self.send_header('Transfer-Encoding', "chunked")
+        self.end_headers()
+
+        def write_line(obj):
+            data = json.dumps(obj).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        try:
+            summary = {"success": True, "result": self.server.sister_ship.handle_command(command, write_line)}
+        except (BrokenPipeError, ConnectionResetError):
+            # HQ went away mid-stream
+            self.close_connection = True
+            return
+        except Exception as e:
+            # e.g. the process couldn't be started; still end the body cleanly
+            summary = {"success": False, "error": str(e)}
+        try:
+            write_line(summary)
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            # HQ went away mid-stream, the process was already killed
+            self.close_connection = True
+
+    def _run_one(self, command):
+        """Run one command, returns (result entry, HTTP status)
+
+        A failing command gets its own error entry, the rest of a batch still runs.
+        """
+        if not isinstance(command, dict) or "type" not in command:
+            return {"success": False, "error": "Command must be an object with a type"}, 400
+        try:
+            return {"success": True, "result": self.server.sister_ship.handle_command(command)}, 200
+        except KeyError as e:
+            return {"success": False, "error": f"Missing field {e}"}, 400
+        except Exception as e:
+            return {"success": False, "error": str(e)}, 500
+
     def log_message(self, format, *args):
         """Custom log function to reduce console spam"""
-        # Print more concise logs
-        if args[1] in ["200", "201"]:  # Successful responses
+        # Print more concise logs; errors such as an idle keep-alive timing
+        # out come through here too, with a single argument
+        if len(args) > 1 and args[1] in ["200", "201"]:  # Successful responses
             return
         super().log_message(format, *args)
 
 
+class MetricsSampler:
+    """Samples system metrics on a background thread, straight from /proc and /sys
+
+    get_status() only reads the cached snapshot, so it costs nothing however
+    often HQ polls. CPU usage is averaged over the sampling interval.
+    """
+
+    def __init__(self, interval=METRICS_INTERVAL):
+        self.interval = interval
+        self._last_cpu_times = None
+        self._stop = threading.Event()
+        self.snapshot = self.sample()
+        self.thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot = self.sample()
+
+    def stop(self):
+        self._stop.set()
+
+    def sample(self):
+        """Take one sample, returns a new snapshot dict"""
+        return {
+            "cpu_temp": self._read_cpu_temp(),
+            "cpu_usage": self._read_cpu_usage(),
+            "memory_usage": self._read_memory_usage(),
+            "disk_usage": self._read_disk_usage(),
+            "player": self._read_player_stats(),
+            "sampled_at": time.time(),
+        }
+
+    def _read_player_stats(self):
+        """Per-screen stats published by light_basic.py, None if it isn't running"""
+        try:
+            with open(PLAYER_STATS_PATH, 'r') as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - stats.get("timestamp", 0) > PLAYER_STATS_MAX_AGE:
+            return None
+        return stats.get("screens")
+
+    def _read_cpu_temp(self):
+        """Get the CPU temperature"""
+        try:
+            with open(THERMAL_ZONE, 'r') as f:
+                return float(f.read()) / 1000.0
+        except (OSError, ValueError):
+            return 0
+
+    def _read_cpu_usage(self):
+        """Get the CPU usage percentage since the previous sample"""
+        try:
+            with open('/proc/stat', 'r') as f:
+                fields = [int(x) for x in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return 0
+        # idle + iowait count as idle, like top does
+        idle, total = fields[3] + fields[4], sum(fields)
+        last, self._last_cpu_times = self._last_cpu_times, (idle, total)
+        if last is None or total == last[1]:
+            return 0
+        return round(100.0 * (1 - (idle - last[0]) / (total - last[1])), 1)
+
+    def _read_memory_usage(self):
+        """Get memory usage statistics (MB)"""
+        try:
+            meminfo = {}
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    key, value = line.split(':', 1)
+                    meminfo[key] = int(value.split()[0])
+            total = meminfo['MemTotal'] // 1024
+            used = (meminfo['MemTotal'] - meminfo['MemAvailable']) // 1024
+            return {
+                "total": total,
+                "used": used,
+                "percent": round(used / total * 100, 1)
+            }
+        except (OSError, ValueError, KeyError, ZeroDivisionError):
+            return {"total": 0, "used": 0, "percent": 0}
+
+    def _read_disk_usage(self):
+        """Get disk usage statistics, formatted like df -h"""
+        try:
+            st = os.statvfs('/')
+        except OSError:
+            return {"total": "0G", "used": "0G", "percent": "0%"}
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        available = st.f_bavail * st.f_frsize
+        # df rounds the percentage up, against space available to users
+        percent = -(-used * 100 // (used + available)) if used + available else 0
+        return {
+            "total": _human_size(total),
+            "used": _human_size(used),
+            "percent": f"{percent}%"
+        }
+
+
+def _human_size(num_bytes):
+    """Format a byte count the way df -h does (1024-based, e.g. 29G, 3.4G)"""
+    size = float(num_bytes)
+    for unit in ("", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            break
+        size /= 1024
+    if unit and size < 10:
+        return f"{size:.1f}{unit}"
+    return f"{size:.0f}{unit}"
+
+
 class SisterShip:
     """Main class representing the sister ship"""
     
-    def __init__(self):
+    def __init__(self, execute_workers=EXECUTE_WORKERS, metrics_interval=METRICS_INTERVAL):
         self.start_time = time.time()
         self.last_command = None
         self.command_count = 0
-        self.command_history = []
+        # Fixed capacity, oldest entries fall off so memory stays flat
+        self.command_history = deque(maxlen=HISTORY_SIZE)
+        # Requests are served on many threads now
+        self.lock = threading.Lock()
+        # Shell commands queue here instead of tying up every request thread
+        self.executor = ThreadPoolExecutor(max_workers=execute_workers,
+                                           thread_name_prefix="execute")
+        self.metrics = MetricsSampler(metrics_interval)
         
     def get_status(self):
         """Get the current status of the ship"""
-        # Get system info
-        cpu_temp = self._get_cpu_temp()
-        cpu_usage = self._get_cpu_usage()
-        memory_usage = self._get_memory_usage()
-        disk_usage = self._get_disk_usage()
-        
+        # System info comes from the sampler's latest snapshot
+        metrics = self.metrics.snapshot
+
         return {
             "ship_name": SHIP_NAME,
             "uptime": time.time() - self.start_time,
@@ -89,22 +345,65 @@ class SisterShip:
             "last_command": self.last_command,
             "command_count": self.command_count,
             "system": {
-                "cpu_temp": cpu_temp,
-                "cpu_usage": cpu_usage,
-                "memory_usage": memory_usage,
-                "disk_usage": disk_usage
-            }
+                "cpu_temp": metrics["cpu_temp"],
+                "cpu_usage": metrics["cpu_usage"],
+                "memory_usage": metrics["memory_usage"],
+                "disk_usage": metrics["disk_usage"],
+                "sampled_at": metrics["sampled_at"]
+            },
+            "player": metrics["player"]
         }
         
-    def handle_command(self, command):
-        """Process a command received from Command HQ"""
-        self.command_count += 1
-        self.last_command = command
-        self.command_history.append(command)
-        
+    def get_history(self, since=0, limit=HISTORY_PAGE):
+        """Commands with an id greater than `since`, oldest first, at most `limit`"""
+        limit = max(0, min(limit, HISTORY_SIZE))
+        with self.lock:
+            entries = [entry for entry in self.command_history if entry["id"] > since]
+            latest_id = self.command_count
+        page = entries[:limit]
+        return {
+            "entries": page,
+            "latest_id": latest_id,
+            # Pass as `since` to fetch the following page
+            "next": page[-1]["id"] if page else since,
+            "more": len(entries) > len(page),
+        }
+
+    def handle_command(self, command, output=None):
+        """Process a command received from Command HQ
+
+        With `output` (a callable taking a dict), execute commands stream
+        their output through it instead of returning it.
+        """
+        # Recorded up front so history stays in id order; duration and
+        # result_size stay None while the command is still running
+        entry = {
+            "id": None,
+            "timestamp": time.time(),
+            "type": command.get("type"),
+            "command": command,
+            "duration": None,
+            "result_size": None,
+        }
+        with self.lock:
+            self.command_count += 1
+            entry["id"] = self.command_count
+            self.last_command = command
+            self.command_history.append(entry)
+
         # Log the command
         print(f"Received command: {command['type']}")
-        
+
+        try:
+            result = self._dispatch(command, output)
+            entry["result_size"] = len(json.dumps(result))
+            return result
+        finally:
+            # Failed commands get a duration too, so they don't look still running
+            entry["duration"] = time.time() - entry["timestamp"]
+
+    def _dispatch(self, command, output=None):
+        """Run a command and return its result"""
         # Handle different command types
         if command["type"] == "echo":
             return {"message": command["data"]}
@@ -126,20 +425,11 @@ class SisterShip:
             return {"message": "Reboot scheduled in 5 seconds"}
             
         elif command["type"] == "execute":
-            # Execute a shell command
-            try:
-                # Be careful with this in production!
-                # This allows arbitrary command execution
-                output = subprocess.check_output(
-                    command["data"], 
-                    shell=True, 
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True
-                )
-                return {"output": output}
-            except subprocess.CalledProcessError as e:
-                return {"error": str(e), "output": e.output}
-                
+            # Run in the bounded pool; this request's thread waits, others don't
+            if output is not None:
+                return self.executor.submit(self._execute_stream, command, output).result()
+            return self.executor.submit(self._execute, command["data"]).result()
+
         elif command["type"] == "status":
             # Return detailed status
             return self.get_status()
@@ -147,74 +437,311 @@ class SisterShip:
         else:
             return {"error": f"Unknown command type: {command['type']}"}
     
-    def _get_cpu_temp(self):
-        """Get the CPU temperature"""
+    def _execute(self, shell_command):
+        """Execute a shell command"""
         try:
-            temp = 0
-            if os.path.exists('/sys/class/thermal/thermal_zone0/temp'):
-                with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                    temp = float(f.read()) / 1000.0
-            return temp
-        except:
-            return 0
-    
-    def _get_cpu_usage(self):
-        """Get the CPU usage percentage"""
-        try:
-            return float(subprocess.check_output(
-                "top -bn1 | grep 'Cpu(s)' | awk '{print $2}'", 
-                shell=True
-            ).decode().strip())
-        except:
-            return 0
-    
-    def _get_memory_usage(self):
-        """Get memory usage statistics"""
-        try:
-            total = subprocess.check_output(
-                "free -m | awk 'NR==2{print $2}'", 
-                shell=True
-            ).decode().strip()
-            used = subprocess.check_output(
-                "free -m | awk 'NR==2{print $3}'", 
-                shell=True
-            ).decode().strip()
-            return {
-                "total": int(total),
-                "used": int(used),
-                "percent": round(int(used) / int(total) * 100, 1)
-            }
-        except:
-            return {"total": 0, "used": 0, "percent": 0}
-    
-    def _get_disk_usage(self):
-        """Get disk usage statistics"""
+            # Be careful with this in production!
+            # This allows arbitrary command execution
+            output = subprocess.check_output(
+                shell_command,
+                shell=True,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True
+            )
+            return {"output": output}
+        except subprocess.CalledProcessError as e:
+            return {"error": str(e), "output": e.output}
+
+    def _execute_stream(self, command, output):
+        """Execute a shell command, passing output chunks to `output` as they arrive
+
+        Never holds more than one read's worth of output. The process is killed
+        when it runs past `timeout` seconds, produces more than `max_output`
+        bytes, or the receiving end goes away.
+        """
+        timeout = float(command.get("timeout", STREAM_TIMEOUT))
+        max_output = int(command.get("max_output", STREAM_MAX_OUTPUT))
+        started = time.time()
+        # Be careful with this in production!
+        # This allows arbitrary command execution
+        # Own process group, so a kill also takes down whatever the shell started
+        process = subprocess.Popen(command["data"], shell=True, start_new_session=True,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        streams = {process.stdout: "stdout", process.stderr: "stderr"}
+        decoders = {f: codecs.getincrementaldecoder("utf-8")(errors="replace") for f in streams}
+        sent = 0
+        timed_out = truncated = disconnected = False
+
+        with selectors.DefaultSelector() as selector:
+            for f in streams:
+                selector.register(f, selectors.EVENT_READ)
+            while selector.get_map():
+                remaining = started + timeout - time.time()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, 4096)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    if sent + len(chunk) > max_output:
+                        chunk = chunk[:max_output - sent]
+                        truncated = True
+                    sent += len(chunk)
+                    text = decoders[key.fileobj].decode(chunk)
+                    try:
+                        if text:
+                            output({"stream": streams[key.fileobj], "data": text})
+                    except OSError:
+                        disconnected = True
+                    if truncated or disconnected:
+                        break
+                if truncated or disconnected:
+                    break
+
+        if not (timed_out or truncated or disconnected):
+            # Both pipes are closed, but the command may still be running,
+            # e.g. it redirected its own output with `exec >log 2>&1`
+            try:
+                process.wait(timeout=max(0, started + timeout - time.time()))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        for f in streams:
+            f.close()
+        return {
+            "exit_code": process.wait(),
+            "duration": time.time() - started,
+            "output_bytes": sent,
+            "timed_out": timed_out,
+            "truncated": truncated,
+            "disconnected": disconnected,
+        }
+
+class FleetClient:
+    """Sends commands to many sister ships at once
+
+    Each ship gets a small pool of keep-alive connections, and every request
+    has its own timeout, so one unreachable Pi only costs its own timeout.
+    Results come back as {host: response dict}, or {host: {"success": False,
+    "error": ...}} for ships that failed.
+    """
+
+    def __init__(self, hosts, port=DEFAULT_PORT, timeout=FLEET_TIMEOUT, max_workers=None):
+        self.hosts = list(hosts)
+        self.port = port
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.hosts)),
+                                           thread_name_prefix="fleet")
+        self.pools = {host: queue.LifoQueue() for host in self.hosts}
+
+    def _connection(self, host):
+        """A pooled connection that still looks open, else a new one; returns (conn, reused)"""
+        while True:
+            try:
+                conn = self.pools[host].get_nowait()
+            except queue.Empty:
+                name, _, port = host.partition(":")
+                return http.client.HTTPConnection(name, int(port or self.port), timeout=self.timeout), False
+            # An idle connection is only readable once the ship has closed it
+            if conn.sock is not None and not select.select([conn.sock], [], [], 0)[0]:
+                return conn, True
+            conn.close()
+
+    def request(self, host, method, path, payload=None):
+        """One request to one ship, retried once if a pooled connection failed before it was sent"""
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for _ in range(2):
+            conn, reused = self._connection(host)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except (BrokenPipeError, ConnectionResetError) as e:
+                # The ship closed the pooled connection and never got the request
+                conn.close()
+                if reused:
+                    continue
+                return {"success": False, "error": str(e)}
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                return {"success": False, "error": str(e)}
+            try:
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # The ship may have run the command already, so it is never sent twice
+                conn.close()
+                return {"success": False, "error": str(e)}
+            self.pools[host].put(conn)
+            if response.status != 200:
+                return {"success": False, "error": f"HTTP {response.status}", "body": data.decode(errors="replace")}
+            try:
+                return json.loads(data.decode())
+            except ValueError as e:
+                return {"success": False, "error": f"Invalid response: {e}"}
+        return {"success": False, "error": "Connection lost"}
+
+    def fan_out(self, method, path, payload=None):
+        """Run the same request against every ship in parallel"""
+        futures = {host: self.executor.submit(self.request, host, method, path, payload)
+                   for host in self.hosts}
+        return {host: future.result() for host, future in futures.items()}
+
+    def send(self, command):
+        if command.get("stream"):
+            # The NDJSON stream would be buffered whole here; stream from one ship directly
+            raise ValueError("FleetClient doesn't support streamed commands")
+        return self.fan_out("POST", "/command", command)
+
+    def send_batch(self, commands):
+        return self.fan_out("POST", "/commands", {"commands": commands})
+
+    def status(self):
+        return self.fan_out("GET", "/status")
+
+    def close(self):
+        self.executor.shutdown()
+        for pool in self.pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+
+
+class TelemetryPublisher:
+    """Pushes compact status deltas to a collector over UDP
+
+    Every interval the tracked fields are compared with what was last sent
+    and only those that moved past their threshold go out, as one small
+    JSON datagram: {"ship", "seq", "t", "full", "d": {field: value}}. Fields
+    that disappear (a screen closed, the player stopped) are sent as null.
+    """
+
+    def __init__(self, sister_ship, collector, interval=TELEMETRY_INTERVAL,
+                 thresholds=TELEMETRY_THRESHOLDS, full_every=TELEMETRY_FULL_EVERY):
+        self.sister_ship = sister_ship
+        host, _, port = collector.partition(":")
+        self.collector = (host, int(port or TELEMETRY_PORT))
+        self.interval = interval
+        self.thresholds = thresholds
+        self.full_every = full_every
+        self.sent = {}
+        self.seq = 0  # Packets sent
+        self.ticks = 0  # Intervals elapsed, sent or not; drives the full snapshots
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def fields(self):
+        """Current values of the tracked fields, flattened"""
+        metrics = self.sister_ship.metrics.snapshot
+        fields = {
+            "temp": metrics["cpu_temp"],
+            "cpu": metrics["cpu_usage"],
+            "mem": metrics["memory_usage"]["percent"],
+        }
+        for screen in metrics["player"] or []:
+            n = screen["screen"]
+            fields[f"fps.{n}"] = screen["fps"]
+            fields[f"dropped.{n}"] = screen["dropped_frames"]
+            fields[f"late.{n}"] = screen["late_frames"]
+            if screen.get("sync"):
+                fields[f"sync.{n}"] = screen["sync"]["offset_ms"]
+        return fields
+
+    def changes(self, fields, full=False):
+        """Fields that moved past their threshold since they were last sent"""
+        if full:
+            changed = dict(fields)
+        else:
+            changed = {}
+            for key, value in fields.items():
+                last = self.sent.get(key)
+                threshold = self.thresholds.get(key.split(".")[0], 0)
+                if last is None or abs(value - last) >= threshold:
+                    changed[key] = value
+        for key in self.sent:
+            if key not in fields:
+                changed[key] = None
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.publish()
+
+    def publish(self):
+        full = self.ticks % self.full_every == 0
+        self.ticks += 1
+        changed = self.changes(self.fields(), full)
+        if not changed and not full:
+            return
+        self.seq += 1
+        packet = {"ship": SHIP_NAME, "seq": self.seq, "t": round(time.time(), 3),
+                  "full": full, "d": changed}
         try:
-            total = subprocess.check_output(
-                "df -h / | awk 'NR==2{print $2}'", 
-                shell=True
-            ).decode().strip()
-            used = subprocess.check_output(
-                "df -h / | awk 'NR==2{print $3}'", 
-                shell=True
-            ).decode().strip()
-            percent = subprocess.check_output(
-                "df -h / | awk 'NR==2{print $5}'", 
-                shell=True
-            ).decode().strip()
-            return {
-                "total": total,
-                "used": used,
-                "percent": percent
-            }
-        except:
-            return {"total": "0G", "used": "0G", "percent": "0%"}
+            self.sock.sendto(json.dumps(packet, separators=(",", ":")).encode(), self.collector)
+        except OSError as e:
+            print(f"Telemetry send failed: {e}")
+        for key, value in changed.items():
+            if value is None:
+                self.sent.pop(key, None)
+            else:
+                self.sent[key] = value
+
+    def stop(self):
+        self._stop.set()
+        self.sock.close()
 
-def run_server(port):
+
+def run_collector(port=TELEMETRY_PORT):
+    """Receive telemetry from every ship and print each ship's state as it changes"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('', port))
+    fleet = {}
+    print(f"Collecting telemetry on UDP port {port}...")
+    try:
+        while True:
+            data, addr = sock.recvfrom(65536)
+            try:
+                packet = json.loads(data.decode())
+            except (ValueError, UnicodeDecodeError):
+                continue
+            # Anything else landing on the port is skipped rather than ending the loop
+            if not (isinstance(packet, dict) and isinstance(packet.get("ship"), str)
+                    and packet["ship"] and isinstance(packet.get("d"), dict)):
+                continue
+            state = fleet.setdefault(packet["ship"], {})
+            if packet.get("full"):
+                state.clear()
+            for key, value in packet["d"].items():
+                if value is None:
+                    state.pop(key, None)
+                else:
+                    state[key] = value
+            summary = " ".join(f"{key}={value}" for key, value in sorted(state.items()))
+            print(f"{datetime.now():%H:%M:%S} {packet['ship']} ({addr[0]}): {summary}")
+    except KeyboardInterrupt:
+        pass
+    sock.close()
+
+
+def run_server(port, execute_workers=EXECUTE_WORKERS, metrics_interval=METRICS_INTERVAL,
+               telemetry=None, telemetry_interval=TELEMETRY_INTERVAL):
     """Run the HTTP server"""
-    sister_ship = SisterShip()
+    sister_ship = SisterShip(execute_workers, metrics_interval)
+    publisher = None
+    if telemetry:
+        publisher = TelemetryPublisher(sister_ship, telemetry, telemetry_interval)
+        print(f"Pushing telemetry to {telemetry}")
     server_address = ('', port)
-    httpd = HTTPServer(server_address, CommandHandler)
+    # One thread per connection, so a slow command never blocks /status
+    httpd = ThreadingHTTPServer(server_address, CommandHandler)
+    httpd.daemon_threads = True
     httpd.sister_ship = sister_ship
     
     print(f"Starting Sister HQ server on port {port}...")
@@ -224,14 +751,32 @@ def run_server(port):
     except KeyboardInterrupt:
         pass
     httpd.server_close()
+    sister_ship.executor.shutdown(wait=False)
+    sister_ship.metrics.stop()
+    if publisher is not None:
+        publisher.stop()
     print("Server stopped.")
 
 def main():
     parser = argparse.ArgumentParser(description="Sister HQ for receiving commands")
     parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to run on")
+    parser.add_argument("--execute-workers", type=int, default=EXECUTE_WORKERS,
+                        help="Maximum number of execute commands running at once")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL,
+                        help="Seconds between system metric samples")
+    parser.add_argument("--telemetry", metavar="HOST[:PORT]",
+                        help=f"Push status deltas to a collector (default port {TELEMETRY_PORT})")
+    parser.add_argument("--telemetry-interval", type=float, default=TELEMETRY_INTERVAL,
+                        help="Seconds between telemetry checks")
+    parser.add_argument("--collect", metavar="PORT", type=int, nargs="?", const=TELEMETRY_PORT,
+                        help="Run as the telemetry collector instead of a ship")
     args = parser.parse_args()
-    
-    run_server(args.port)
+
+    if args.collect:
+        run_collector(args.collect)
+        return
+    run_server(args.port, args.execute_workers, args.metrics_interval,
+               args.telemetry, args.telemetry_interval)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
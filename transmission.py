@@ -1,13 +1,122 @@
 import mido
-import json
 import time
 import socket
+import argparse
+import queue
+import random
+import itertools
+
+from midi_protocol import DEFAULT_GROUP, encode_binary, encode_json, multicast_sender
 
 PORT = 8081
 # Try multiple broadcast addresses
 BROADCAST_ADDRS = ["255.255.255.255", "192.168.1.255", "192.168.0.255"]
+# MIDI message types forwarded to the screens
+MIDI_TYPES = ('note_on', 'note_off', 'control_change')
+# Default window for coalescing knob sweeps, in milliseconds
+CC_WINDOW_MS = 8
+
+
+class LatencyHistogram:
+    """Counts latencies into fixed buckets (upper bounds in seconds)"""
+
+    BUCKETS = [50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2e-3, 5e-3, 10e-3]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.total = 0
+        self.worst = 0.0
+
+    def add(self, seconds):
+        index = 0
+        while index < len(self.BUCKETS) and seconds >= self.BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += 1
+        self.worst = max(self.worst, seconds)
+
+    def format(self):
+        if not self.total:
+            return "  no events"
+        lines = []
+        lower = 0.0
+        for upper, count in zip(self.BUCKETS + [None], self.counts):
+            label = f">= {lower * 1e3:g} ms" if upper is None else f"< {upper * 1e3:g} ms"
+            bar = '#' * round(40 * count / self.total)
+            lines.append(f"  {label:>10}: {count:6d} {bar}")
+            lower = upper
+        lines.append(f"  worst: {self.worst * 1e3:.3f} ms over {self.total} events")
+        return "\n".join(lines)
+
+
+class ControlCoalescer:
+    """Rate limits control_change to one send per (channel, control) per window
+
+    The first change after a quiet period goes out immediately; changes
+    arriving within the window only replace the pending value, which is sent
+    when the window closes. Latest value wins.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.last_sent = {}
+        self.pending = {}
+        self.coalesced = 0
+
+    def offer(self, now, event):
+        """Return the event if it can be sent now, otherwise hold it"""
+        msg = event[2]
+        key = (msg.channel, msg.control)
+        last = self.last_sent.get(key)
+        if key not in self.pending and (last is None or now - last >= self.window):
+            self.last_sent[key] = now
+            return event
+        if key in self.pending:
+            self.coalesced += 1
+        self.pending[key] = event
+        return None
+
+    def next_deadline(self):
+        """When the earliest held value is due, None if nothing is held"""
+        if not self.pending:
+            return None
+        return min(self.last_sent[key] + self.window for key in self.pending)
+
+    def due(self, now):
+        """Pop the held events whose window has closed"""
+        ready = [key for key in self.pending if now - self.last_sent[key] >= self.window]
+        for key in ready:
+            self.last_sent[key] = now
+        return [self.pending.pop(key) for key in ready]
+
+
+def broadcast(sock, data, addrs=BROADCAST_ADDRS):
+    """Send data to every address (broadcast or multicast groups), True if any send succeeded"""
+    success = False
+    for addr in addrs:
+        try:
+            sock.sendto(data, (addr, PORT))
+            success = True
+            # Don't flood console with success messages
+        except Exception:
+            continue
+    return success
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Broadcast LPD8 MIDI events over UDP")
+    parser.add_argument("--format", choices=["binary", "json"], default="binary",
+                        help="Wire format (json for receivers that predate the binary packet)")
+    parser.add_argument("--cc-window", type=float, default=CC_WINDOW_MS,
+                        help="Coalesce knob changes within this many ms (0 to send every one)")
+    parser.add_argument("--multicast", metavar="GROUP", nargs="?", action="append", const=DEFAULT_GROUP,
+                        help=f"Send once to a multicast group (default {DEFAULT_GROUP}) instead of "
+                             "broadcasting; repeat to address several zones")
+    parser.add_argument("--ttl", type=int, default=1, help="Multicast TTL (1 stays on the local subnet)")
+    parser.add_argument("--interface", help="Local interface address to send multicast from")
+    args = parser.parse_args()
+    encode = encode_binary if args.format == "binary" else encode_json
+
     # List available input ports
     print("Available MIDI input ports:")
     ports = mido.get_input_names()
@@ -28,54 +137,79 @@ def main():
         port_index = int(input("Enter port number: "))
         lpd8_port = ports[port_index]
     
-    # Set up UDP socket for broadcasting
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    # Set up UDP socket for multicast, or broadcasting
+    if args.multicast:
+        sock = multicast_sender(args.ttl, args.interface)
+        addrs = args.multicast
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        addrs = BROADCAST_ADDRS
     # Set socket timeout to avoid blocking
     sock.settimeout(0.1)
     
-    # Open the input port
-    with mido.open_input(lpd8_port) as inport:
-        print(f"Monitoring {lpd8_port} and broadcasting to port {PORT}")
+    # Events captured by the MIDI callback, waiting to be sent
+    events = queue.Queue()
+
+    def on_message(msg):
+        # Runs on mido's input thread as soon as the event arrives
+        if msg.type in MIDI_TYPES:
+            events.put((time.perf_counter(), time.time(), msg))
+
+    latency = LatencyHistogram()
+    coalescer = ControlCoalescer(args.cc_window / 1000.0)
+
+    # Receivers de-duplicate and count loss per (sender, seq)
+    sender_id = random.getrandbits(32)
+    sequence = itertools.count(1)
+
+    def send(event):
+        captured, timestamp, msg = event
+
+        # Create message payload and send it before any console output
+        data = encode(msg.type, msg.dict(), timestamp, sender_id, next(sequence))
+        success = broadcast(sock, data, addrs)
+        latency.add(time.perf_counter() - captured)
+
+        # Print to console
+        if msg.type == 'note_on':
+            pad_number = msg.note - 36 + 1  # LPD8 pads typically start at note 36
+            velocity = msg.velocity
+            print(f"Pad {pad_number} pressed with velocity {velocity}")
+        elif msg.type == 'control_change':
+            print(f"Knob: controller={msg.control}, value={msg.value}")
+
+        if not success:
+            print("✗ Send failed")
+
+    # Open the input port in callback mode, no polling
+    with mido.open_input(lpd8_port, callback=on_message):
+        print(f"Monitoring {lpd8_port} and sending to {', '.join(addrs)} port {PORT}")
         try:
             while True:
-                for msg in inport.iter_pending():
-                    if msg.type in ['note_on', 'note_off', 'control_change']:
-                        # Create message payload
-                        command = {
-                            "timestamp": time.time(),
-                            "type": msg.type,
-                            "data": dict(msg.dict())
-                        }
-                        
-                        # Print to console
-                        if msg.type == 'note_on':
-                            pad_number = msg.note - 36 + 1  # LPD8 pads typically start at note 36
-                            velocity = msg.velocity
-                            print(f"Pad {pad_number} pressed with velocity {velocity}")
-                        elif msg.type == 'control_change':
-                            print(f"Knob: controller={msg.control}, value={msg.value}")
-                        
-                        # Try multiple broadcast addresses
-                        data = json.dumps(command).encode()
-                        success = False
-                        for addr in BROADCAST_ADDRS:
-                            try:
-                                sock.sendto(data, (addr, PORT))
-                                success = True
-                                # Don't flood console with success messages
-                            except Exception:
-                                continue
-                                
-                        if success:
-                            print("✓ Broadcast sent")
-                        else:
-                            print("✗ Broadcast failed")
-
-                time.sleep(0.001)
+                # Block until the next event, or until a held knob value is due
+                deadline = coalescer.next_deadline()
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                try:
+                    event = events.get(timeout=timeout)
+                except queue.Empty:
+                    event = None
+
+                if event is not None:
+                    # Notes pass straight through, knob changes are coalesced
+                    if event[2].type == 'control_change' and coalescer.window > 0:
+                        event = coalescer.offer(event[0], event)
+                    if event is not None:
+                        send(event)
+
+                for held in coalescer.due(time.perf_counter()):
+                    send(held)
         except KeyboardInterrupt:
             sock.close()
+            print("\nCapture to sendto latency:")
+            print(latency.format())
+            print(f"Knob changes coalesced: {coalescer.coalesced}")
             print("\nExiting...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()